@@ -152,6 +152,10 @@ class MainActivity : ComponentActivity(), SensorEventListener {
             var autoReconnect by remember { mutableStateOf(prefs.getBoolean("auto_reconnect", true)) }
             var deviceName by remember { mutableStateOf(prefs.getString("device_name", "Player 1") ?: "Player 1") }
             var touchSensitivity by remember { mutableFloatStateOf(prefs.getFloat("touch_sensitivity", 1.0f)) }
+            var controllerType by remember { mutableIntStateOf(prefs.getInt("controller_type", 0)) }
+
+            // Sent in HELLO_EX, so a change takes effect on the next (re)connect
+            LaunchedEffect(controllerType) { networkController.controllerType = controllerType }
             
             // Screen On Logic
             LaunchedEffect(keepScreenOn) {
@@ -375,7 +379,8 @@ class MainActivity : ComponentActivity(), SensorEventListener {
                     touchVibration = touchVibration,
                     autoReconnect = autoReconnect,
                     deviceName = deviceName,
-                    touchSensitivity = touchSensitivity
+                    touchSensitivity = touchSensitivity,
+                    controllerType = controllerType
                 ),
                 onThemeChange = { mode -> 
                     themeMode = mode
@@ -422,6 +427,10 @@ class MainActivity : ComponentActivity(), SensorEventListener {
                     touchSensitivity = it
                     prefs.edit().putFloat("touch_sensitivity", it).apply()
                 },
+                onControllerTypeChange = {
+                    controllerType = it
+                    prefs.edit().putInt("controller_type", it).apply()
+                },
                 onSave = { showSettings = false },
                 onReset = {
                     // Reset to defaults
@@ -435,6 +444,7 @@ class MainActivity : ComponentActivity(), SensorEventListener {
                     autoReconnect = true
                     // deviceName = "Player 1" // Keep existing name
                     touchSensitivity = 1.0f
+                    controllerType = 0
                     gyroRollOffset = 0
                     gyroPitchOffset = 0
                     
@@ -449,6 +459,7 @@ class MainActivity : ComponentActivity(), SensorEventListener {
                     editor.putBoolean("auto_reconnect", true)
                     // editor.putString("device_name", "Player 1")
                     editor.putFloat("touch_sensitivity", 1.0f)
+                    editor.putInt("controller_type", 0)
                     editor.apply()
                 }
             )
@@ -44,6 +44,15 @@ class NetworkController {
 
     private var lastPingTime = 0L
 
+    // Session token from the server's SESSION (0x13) reply. Sent back in HELLO_EX on
+    // reconnect so the PC reattaches us to the same slot / virtual pad.
+    private var sessionToken: ByteArray? = null
+    var playerSlot = -1
+        private set
+
+    // Virtual pad the PC should create for us: 0 = PC default, 1 = Xbox 360, 2 = DualShock 4
+    var controllerType = 0
+
     fun connect(ip: String? = null) {
         if (isRunning.get()) return
         isRunning.set(true)
@@ -67,8 +76,11 @@ class NetworkController {
                 outputStream = socket?.getOutputStream()
                 inputStream = socket?.getInputStream()
 
-                // Handshake
-                outputStream?.write(0x10)
+                // Handshake: HELLO_EX [len][TLV...], with our token if we have one
+                val token = sessionToken
+                var tlv = if (token != null) byteArrayOf(0x01, token.size.toByte()) + token else ByteArray(0)
+                if (controllerType != 0) tlv += byteArrayOf(0x02, 1, controllerType.toByte())
+                outputStream?.write(byteArrayOf(0x12, tlv.size.toByte()) + tlv)
                 outputStream?.flush()
 
                 // Start Sender Loops
@@ -87,6 +99,20 @@ class NetworkController {
 
                     if (header == 0x11) {
                          Log.d("Nexus", "Handshake OK")
+                    }
+                    else if (header == 0x13) { // SESSION [slot][resumed][token x8]
+                        val slot = inputStream?.read() ?: -1
+                        val resumed = inputStream?.read() ?: 0
+                        val newToken = ByteArray(8)
+                        var got = 0
+                        while (got < 8) {
+                            val n = inputStream?.read(newToken, got, 8 - got) ?: -1
+                            if (n < 0) throw Exception("EOF")
+                            got += n
+                        }
+                        sessionToken = newToken
+                        playerSlot = slot
+                        Log.d("Nexus", if (resumed == 1) "Session resumed (slot $slot)" else "Session started (slot $slot)")
                     } 
                     else if (header == 0xF1) { // PONG
                         val lat = System.currentTimeMillis() - lastPingTime
@@ -218,6 +244,12 @@ class NetworkController {
         packet[10] = (roll).toByte()
         packet[11] = (pitch shr 8).toByte()
         packet[12] = (pitch).toByte()
+        // Send time (u32 ms, big endian) so the server can chart input latency
+        val ts = System.currentTimeMillis()
+        packet[13] = (ts shr 24).toByte()
+        packet[14] = (ts shr 16).toByte()
+        packet[15] = (ts shr 8).toByte()
+        packet[16] = (ts).toByte()
         
         inputChannel.trySend(packet)
     }
@@ -304,6 +336,7 @@ class NetworkController {
     fun startDiscovery(context: android.content.Context, onFound: (String, String) -> Unit) {
         if (isDiscovering) return
         isDiscovering = true
+        listenForAnnouncements(context, onFound)
         scope.launch {
             var ds: DatagramSocket? = null
             try {
@@ -335,6 +368,38 @@ class NetworkController {
         }
     }
     
+    // The server multicasts (and broadcasts) PC_SERVER:<name> on port 6002 when it
+    // starts or its interfaces change, so a phone already on this screen finds it
+    // without waiting for its own DISCOVER round trip.
+    private fun listenForAnnouncements(context: android.content.Context, onFound: (String, String) -> Unit) {
+        scope.launch {
+            val wifi = context.applicationContext.getSystemService(android.content.Context.WIFI_SERVICE) as? android.net.wifi.WifiManager
+            val lock = wifi?.createMulticastLock("nexus-discovery")?.apply { setReferenceCounted(false); acquire() }
+            var ms: java.net.MulticastSocket? = null
+            try {
+                ms = java.net.MulticastSocket(6002)
+                ms.soTimeout = 1000
+                try { ms.joinGroup(java.net.InetAddress.getByName("239.255.60.1")) } catch (e: Exception) {} // broadcast still arrives
+                val buf = ByteArray(1024)
+                while (isDiscovering) {
+                    try {
+                        val rcv = DatagramPacket(buf, buf.size)
+                        ms.receive(rcv)
+                        val s = String(rcv.data, 0, rcv.length)
+                        if (s.startsWith("PC_SERVER:")) {
+                            val name = s.substringAfter(":")
+                            withContext(Dispatchers.Main) { onFound(rcv.address.hostAddress, name) }
+                        }
+                    } catch (e: java.net.SocketTimeoutException) {}
+                }
+            } catch (e: Exception) {
+            } finally {
+                ms?.close()
+                lock?.release()
+            }
+        }
+    }
+
     fun stopDiscovery() {
         isDiscovering = false
     }
@@ -51,7 +51,8 @@ data class SettingsState(
     val touchVibration: Boolean = true, // Master Touch vibration toggle
     val autoReconnect: Boolean = true,
     val deviceName: String = "Player 1",
-    val touchSensitivity: Float = 1.0f
+    val touchSensitivity: Float = 1.0f,
+    val controllerType: Int = 0 // Virtual pad asked for in HELLO_EX: 0 = PC default, 1 = Xbox 360, 2 = DualShock 4
 )
 
 @Composable
@@ -70,6 +71,7 @@ fun SettingsScreen(
     onAutoReconnectToggle: (Boolean) -> Unit,
     onDeviceNameChange: (String) -> Unit,
     onTouchSensitivityChange: (Float) -> Unit,
+    onControllerTypeChange: (Int) -> Unit,
     onSave: () -> Unit,
     onReset: () -> Unit
 ) {
@@ -136,6 +138,7 @@ fun SettingsScreen(
                     onAutoReconnectToggle = onAutoReconnectToggle,
                     onDeviceNameChange = onDeviceNameChange,
                     onTouchSensitivityChange = onTouchSensitivityChange,
+                    onControllerTypeChange = onControllerTypeChange,
                     onBack = onBack,
                     isLightMode = state.themeMode == "Light"
                 )
@@ -322,6 +325,7 @@ fun SettingsContent(
     onAutoReconnectToggle: (Boolean) -> Unit,
     onDeviceNameChange: (String) -> Unit,
     onTouchSensitivityChange: (Float) -> Unit,
+    onControllerTypeChange: (Int) -> Unit,
     onBack: () -> Unit,
     isLightMode: Boolean
 ) {
@@ -436,6 +440,26 @@ fun SettingsContent(
                     borderColor = borderColor
                 )
 
+                Spacer(modifier = Modifier.height(16.dp))
+
+                // Virtual pad the PC creates for this phone (applies on the next connect)
+                Text("Virtual Controller", color = contentTextColor, fontSize = 14.sp)
+                Box(
+                    modifier = Modifier
+                        .fillMaxWidth()
+                        .height(64.dp)
+                        .padding(top = 8.dp)
+                        .background(containerColor, RoundedCornerShape(16.dp))
+                        .border(1.dp, borderColor, RoundedCornerShape(16.dp))
+                        .padding(6.dp)
+                ) {
+                    Row(modifier = Modifier.fillMaxSize()) {
+                        ThemeRadioButton("PC Default", selected = state.controllerType == 0, modifier = Modifier.weight(1f), isLightMode) { onControllerTypeChange(0) }
+                        ThemeRadioButton("Xbox 360", selected = state.controllerType == 1, modifier = Modifier.weight(1f), isLightMode) { onControllerTypeChange(1) }
+                        ThemeRadioButton("DualShock 4", selected = state.controllerType == 2, modifier = Modifier.weight(1f), isLightMode) { onControllerTypeChange(2) }
+                    }
+                }
+
                 Spacer(modifier = Modifier.height(24.dp))
                 
                 SettingsSectionHeader("Sensors", contentTextColor)
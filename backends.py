@@ -0,0 +1,224 @@
+# --- Output backends ---
+# A backend creates virtual pads; a pad takes raw decoded input (sticks as the
+# raw protocol bytes, triggers 0-255, the 14-bit button word) and pushes it to
+# wherever it goes. ViGEm (X360/DS4) is one adapter behind this interface; the
+# null and recording backends let the receiver run without the driver.
+import threading
+from collections import deque
+
+import decode
+from decode import STICK_INT, STICK_INT_INV, STICK_FLOAT, STICK_FLOAT_INV, DPAD_MASK, DPAD_SHIFT
+
+vg = None
+_tables = {}
+
+
+def load_vgamepad():
+    # vgamepad loads the ViGEm client on import, so only do it when a real pad is needed
+    global vg
+    if vg is None:
+        import vgamepad
+        vg = vgamepad
+        _tables['x360'] = decode.button_table(vg.XUSB_BUTTON, decode.X360_BUTTON_NAMES)
+        _tables['ds4'] = decode.button_table(vg.DS4_BUTTONS, decode.DS4_BUTTON_NAMES)
+        _tables['ds4_dpad'] = decode.button_table(vg.DS4_DPAD_DIRECTIONS, decode.DS4_DPAD_NAMES)
+    return vg
+
+
+class VirtualPad:
+    kind = None
+
+    def __init__(self):
+        self.on_rumble = None # callable(large_motor, small_motor), set by the owning session
+
+    def left_stick(self, x, y): pass
+    def right_stick(self, x, y): pass
+    def left_trigger(self, value): pass
+    def right_trigger(self, value): pass
+    def buttons(self, word, changed): pass
+    def update(self): pass
+    def reset(self): pass
+
+    def rumble(self, large_motor, small_motor):
+        if self.on_rumble: self.on_rumble(large_motor, small_motor)
+
+
+class VigemPad(VirtualPad):
+    # Shared by the X360/DS4 adapters; subclasses pick the device and button table
+    def __init__(self, pad, table):
+        super().__init__()
+        self.pad = pad
+        self.table = table
+        self.pad.register_notification(callback_function=self._notify)
+
+    # FIXED SIGNATURE: match vgamepad expectation strictly
+    def _notify(self, client, target, large_motor, small_motor, led_number, user_data):
+        self.rumble(large_motor, small_motor)
+
+    def left_trigger(self, value): self.pad.left_trigger(value)
+    def right_trigger(self, value): self.pad.right_trigger(value)
+
+    def buttons(self, word, changed):
+        pad, table = self.pad, self.table
+        while changed:
+            low = changed & -changed
+            if word & low: pad.press_button(table[low.bit_length() - 1])
+            else: pad.release_button(table[low.bit_length() - 1])
+            changed ^= low
+
+    def update(self): self.pad.update()
+    def reset(self): self.pad.reset()
+
+
+class X360Pad(VigemPad):
+    kind = 'x360'
+
+    def __init__(self):
+        super().__init__(load_vgamepad().VX360Gamepad(), _tables['x360'])
+
+    def left_stick(self, x, y): self.pad.left_joystick(x_value=STICK_INT[x], y_value=STICK_INT_INV[y])
+    def right_stick(self, x, y): self.pad.right_joystick(x_value=STICK_INT[x], y_value=STICK_INT_INV[y])
+
+
+class DS4Pad(VigemPad):
+    kind = 'ds4'
+
+    def __init__(self):
+        super().__init__(load_vgamepad().VDS4Gamepad(), _tables['ds4'])
+        self.dpad = _tables['ds4_dpad']
+
+    # DS4 rumble callback carries a lightbar colour instead of an LED number
+    def _notify(self, client, target, large_motor, small_motor, lightbar_color, user_data):
+        self.rumble(large_motor, small_motor)
+
+    def left_stick(self, x, y): self.pad.left_joystick_float(STICK_FLOAT[x], STICK_FLOAT_INV[y])
+    def right_stick(self, x, y): self.pad.right_joystick_float(STICK_FLOAT[x], STICK_FLOAT_INV[y])
+
+    def buttons(self, word, changed):
+        if changed & DPAD_MASK:
+            self.pad.directional_pad(self.dpad[(word & DPAD_MASK) >> DPAD_SHIFT])
+            changed &= ~DPAD_MASK
+        VigemPad.buttons(self, word, changed)
+
+
+class NullPad(VirtualPad):
+    def __init__(self, kind):
+        super().__init__()
+        self.kind = kind
+        self.updates = 0
+
+    def update(self): self.updates += 1
+
+
+class RecordingPad(NullPad):
+    # Keeps the current state and a bounded history of every update() snapshot
+    def __init__(self, kind, history=10000):
+        super().__init__(kind)
+        self.state = [0, 0, 0, 0, 0, 0, 0] # lx, ly, rx, ry, lt, rt, buttons
+        self.reports = deque(maxlen=history)
+
+    def left_stick(self, x, y): self.state[0] = x; self.state[1] = y
+    def right_stick(self, x, y): self.state[2] = x; self.state[3] = y
+    def left_trigger(self, value): self.state[4] = value
+    def right_trigger(self, value): self.state[5] = value
+    def buttons(self, word, changed): self.state[6] = word
+
+    def update(self):
+        self.updates += 1
+        self.reports.append(tuple(self.state))
+
+    def reset(self):
+        self.state = [0, 0, 0, 0, 0, 0, 0]
+
+
+class OutputBackend:
+    name = None
+
+    def create(self, kind):
+        raise NotImplementedError
+
+
+class VigemBackend(OutputBackend):
+    name = 'vigem'
+
+    def create(self, kind):
+        return DS4Pad() if kind == 'ds4' else X360Pad()
+
+
+class NullBackend(OutputBackend):
+    name = 'null'
+
+    def create(self, kind):
+        return NullPad(kind)
+
+
+class RecordingBackend(OutputBackend):
+    name = 'recording'
+
+    def __init__(self, history=10000):
+        self.history = history
+        self.pads = []
+
+    def create(self, kind):
+        pad = RecordingPad(kind, self.history)
+        self.pads.append(pad)
+        return pad
+
+
+class GamepadPool:
+    # Creating a ViGEm target makes Windows enumerate a new device, which stalls
+    # the first connect for a noticeable moment. The pool creates pads ahead of
+    # time and keeps released ones parked (neutral, still plugged in) for the
+    # next player instead of destroying them. Parked pads are visible to games
+    # as idle controllers, so prewarming is opt-in.
+    def __init__(self, backend):
+        self.backend = backend
+        self.lock = threading.Lock()
+        self.idle = {'x360': deque(), 'ds4': deque()}
+        self.created = 0
+        self.hits = 0   # acquire() served from a parked pad
+        self.misses = 0 # acquire() had to create one
+
+    def _create(self, kind):
+        pad = self.backend.create(kind)
+        with self.lock: self.created += 1
+        return pad
+
+    def prewarm(self, kind, count):
+        # Top up the parked pads of one kind to count
+        while True:
+            with self.lock:
+                if len(self.idle[kind]) >= count: return
+            pad = self._create(kind)
+            with self.lock: self.idle[kind].append(pad)
+
+    def acquire(self, kind):
+        # -> (pad, hit)
+        with self.lock:
+            if self.idle[kind]:
+                self.hits += 1
+                return self.idle[kind].popleft(), True
+            self.misses += 1
+        return self._create(kind), False
+
+    def release(self, pad):
+        pad.on_rumble = None
+        pad.reset()
+        pad.update()
+        with self.lock: self.idle[pad.kind].append(pad)
+
+    def stats(self):
+        with self.lock:
+            return {
+                'created': self.created, 'hits': self.hits, 'misses': self.misses,
+                'idle_x360': len(self.idle['x360']), 'idle_ds4': len(self.idle['ds4'])
+            }
+
+
+BACKENDS = {b.name: b for b in (VigemBackend, NullBackend, RecordingBackend)}
+
+
+def get_backend(name):
+    if name not in BACKENDS:
+        raise ValueError(f"Unknown output backend '{name}' (choose from {', '.join(BACKENDS)})")
+    return BACKENDS[name]()
@@ -0,0 +1,115 @@
+# Per-frame CPU time to decode a DATA frame: the original inline parsing in
+# process_gamepad_data vs. decode.py's struct unpack + precomputed tables.
+# Both paths turn a 16-byte payload into the X360 stick values, triggers,
+# dashboard visuals and per-button pressed states; driver calls are excluded.
+#
+#   python bench/bench_decode.py [--frames 200000]
+import argparse
+import enum
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+import decode
+from decode import decode_frame, STICK_INT, STICK_INT_INV, VISUAL, VISUAL_INV, TRIGGER_VISUAL, BUTTON_MASK
+
+
+class XUSB_BUTTON(enum.IntFlag):
+    # Stand-in for vgamepad.XUSB_BUTTON so the benchmark runs without ViGEm
+    XUSB_GAMEPAD_DPAD_UP = 0x0001; XUSB_GAMEPAD_DPAD_DOWN = 0x0002
+    XUSB_GAMEPAD_DPAD_LEFT = 0x0004; XUSB_GAMEPAD_DPAD_RIGHT = 0x0008
+    XUSB_GAMEPAD_START = 0x0010; XUSB_GAMEPAD_BACK = 0x0020
+    XUSB_GAMEPAD_LEFT_THUMB = 0x0040; XUSB_GAMEPAD_RIGHT_THUMB = 0x0080
+    XUSB_GAMEPAD_LEFT_SHOULDER = 0x0100; XUSB_GAMEPAD_RIGHT_SHOULDER = 0x0200
+    XUSB_GAMEPAD_A = 0x1000; XUSB_GAMEPAD_B = 0x2000; XUSB_GAMEPAD_X = 0x4000; XUSB_GAMEPAD_Y = 0x8000
+
+
+def legacy_map_stick(val):
+    norm = val / 127.0
+    if norm > 1.0: norm = 1.0
+    if norm < -1.0: norm = -1.0
+    return norm, int(norm * 32000)
+
+
+def legacy_decode(data):
+    # Parsing half of the original process_gamepad_data, X360 path
+    lx, ly, rx, ry = data[0], data[1], data[2], data[3]
+    btns_low, btns_high, lt, rt = data[4], data[5], data[6], data[7]
+    def to_signed(b): return b - 256 if b > 127 else b
+    lx = to_signed(lx); ly = to_signed(ly); rx = to_signed(rx); ry = to_signed(ry)
+    roll = int.from_bytes(data[8:10], 'big', signed=True)
+    pitch = int.from_bytes(data[10:12], 'big', signed=True)
+    visuals = {'lx': lx/127.0, 'ly': -ly/127.0, 'rx': rx/127.0, 'ry': -ry/127.0,
+               'lt': lt/255.0, 'rt': rt/255.0, 'active': True}
+    lx_f, lx_i = legacy_map_stick(lx)
+    ly_f, ly_i = legacy_map_stick(ly)
+    rx_f, rx_i = legacy_map_stick(rx)
+    ry_f, ry_i = legacy_map_stick(ry)
+    ly_f, ly_i = -ly_f, -ly_i
+    ry_f, ry_i = -ry_f, -ry_i
+    b = XUSB_BUTTON
+    map_b = [
+        (0x01, b.XUSB_GAMEPAD_A), (0x02, b.XUSB_GAMEPAD_B),
+        (0x04, b.XUSB_GAMEPAD_X), (0x08, b.XUSB_GAMEPAD_Y),
+        (0x10, b.XUSB_GAMEPAD_LEFT_SHOULDER), (0x20, b.XUSB_GAMEPAD_RIGHT_SHOULDER),
+        (0x40, b.XUSB_GAMEPAD_BACK), (0x80, b.XUSB_GAMEPAD_START)
+    ]
+    map_h = [
+        (0x01, b.XUSB_GAMEPAD_LEFT_THUMB), (0x02, b.XUSB_GAMEPAD_RIGHT_THUMB),
+        (0x04, b.XUSB_GAMEPAD_DPAD_UP), (0x08, b.XUSB_GAMEPAD_DPAD_DOWN),
+        (0x10, b.XUSB_GAMEPAD_DPAD_LEFT), (0x20, b.XUSB_GAMEPAD_DPAD_RIGHT)
+    ]
+    pressed = []
+    for mask, btn in map_b: pressed.append((btn, bool(btns_low & mask)))
+    for mask, btn in map_h: pressed.append((btn, bool(btns_high & mask)))
+    return (lx_i, ly_i, rx_i, ry_i, lt, rt, roll, pitch), visuals, pressed
+
+
+X360_BUTTONS = decode.button_table(XUSB_BUTTON, decode.X360_BUTTON_NAMES)
+
+
+def table_decode(data):
+    lx, ly, rx, ry, btns_low, btns_high, lt, rt, roll, pitch, _ = decode_frame(data)
+    visuals = {'lx': VISUAL[lx], 'ly': VISUAL_INV[ly], 'rx': VISUAL[rx], 'ry': VISUAL_INV[ry],
+               'lt': TRIGGER_VISUAL[lt], 'rt': TRIGGER_VISUAL[rt], 'active': True}
+    buttons = (btns_low | btns_high << 8) & BUTTON_MASK
+    pressed = [(btn, bool(buttons >> i & 1)) for i, btn in enumerate(X360_BUTTONS)]
+    return (STICK_INT[lx], STICK_INT_INV[ly], STICK_INT[rx], STICK_INT_INV[ry], lt, rt, roll, pitch), visuals, pressed
+
+
+def make_frames(n):
+    rng = random.Random(7)
+    frames = []
+    for _ in range(n):
+        f = bytearray(rng.randrange(256) for _ in range(16))
+        f[5] &= 0x3F # keep mouse mode off so both paths see the same buttons
+        frames.append(bytes(f))
+    return frames
+
+
+def bench(fn, frames):
+    t0 = time.process_time()
+    for f in frames: fn(f)
+    return (time.process_time() - t0) / len(frames)
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument('--frames', type=int, default=200000)
+    args = ap.parse_args()
+    frames = make_frames(args.frames)
+
+    for f in frames[:1000]:
+        assert legacy_decode(f) == table_decode(f), f
+
+    before = bench(legacy_decode, frames)
+    after = bench(table_decode, frames)
+    print(f"before (inline parse):  {before * 1e6:7.3f} us/frame")
+    print(f"after  (decode tables): {after * 1e6:7.3f} us/frame")
+    print(f"speedup: {before / after:.2f}x")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,137 @@
+# Time-to-discover on loopback with several simulated phones, for the old
+# single-socket discovery_loop vs. discovery.DiscoveryResponder. Phones behave
+# like the Android client (send DISCOVER_CONTROLLER, wait up to 2 s, sleep 1 s,
+# repeat) and are already searching when the server comes up, as when the PC
+# app is opened with the phone on the connect screen. Reported times are from
+# server start to the phone's first PC_SERVER packet (reply or announcement).
+#
+#   python bench/bench_discovery.py [--clients 8] [--lead 0.5] [--json]
+import argparse
+import json
+import os
+import socket
+import sys
+import threading
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+import discovery
+
+TIMEOUT = 2.0 # NetworkController.startDiscovery soTimeout
+RETRY_DELAY = 1.0
+
+
+def percentile(values, q):
+    if not values: return 0.0
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * q))]
+
+
+def free_port():
+    s = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+    s.bind(('127.0.0.1', 0))
+    port = s.getsockname()[1]
+    s.close()
+    return port
+
+
+class SimPhone:
+    def __init__(self, server_port):
+        self.server = ('127.0.0.1', server_port)
+        self.sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        self.sock.bind(('127.0.0.1', 0))
+        self.addr = self.sock.getsockname()
+        self.found_at = None
+        self.requests = 0
+        self.stop = False
+
+    def run(self):
+        while not self.stop and self.found_at is None:
+            try:
+                self.sock.sendto(discovery.REQUEST, self.server)
+                self.requests += 1
+            except OSError: pass
+            deadline = time.perf_counter() + TIMEOUT
+            while self.found_at is None and not self.stop:
+                left = deadline - time.perf_counter()
+                if left <= 0: break
+                self.sock.settimeout(left)
+                try: data, _ = self.sock.recvfrom(1024)
+                except (socket.timeout, ConnectionResetError): break
+                except OSError: return
+                if data.startswith(discovery.REPLY_PREFIX): self.found_at = time.perf_counter()
+            if self.found_at is None: time.sleep(RETRY_DELAY)
+
+
+class LegacyServer:
+    # receiver.discovery_loop before the responder
+    def __init__(self, port):
+        self.sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        self.sock.setsockopt(socket.SOL_SOCKET, socket.SO_BROADCAST, 1)
+        self.sock.bind(('127.0.0.1', port))
+        self.running = True
+        self.replies = 0
+        threading.Thread(target=self._run, daemon=True).start()
+
+    def _run(self):
+        while self.running:
+            try:
+                data, addr = self.sock.recvfrom(1024)
+                if data == b'DISCOVER_CONTROLLER':
+                    resp = f"PC_SERVER:{socket.gethostname()}".encode()
+                    self.sock.sendto(resp, addr)
+                    self.replies += 1
+            except: break
+
+    def close(self):
+        self.running = False
+        self.sock.close()
+
+
+def run(mode, clients, lead):
+    port = free_port()
+    phones = [SimPhone(port) for _ in range(clients)]
+    threads = [threading.Thread(target=p.run, daemon=True) for p in phones]
+    for t in threads: t.start()
+    time.sleep(lead) # phones are already searching
+
+    t0 = time.perf_counter()
+    if mode == 'legacy':
+        server = LegacyServer(port)
+    else:
+        # No real NICs here: announce straight to the simulated phones
+        server = discovery.DiscoveryResponder(port, host='127.0.0.1', ips=[], announce_targets=[p.addr for p in phones])
+        server.start()
+    for t in threads: t.join(timeout=10)
+    for p in phones: p.stop = True
+    server.close()
+
+    times = [(p.found_at - t0) * 1000 for p in phones if p.found_at]
+    return {
+        'mode': mode,
+        'clients': clients,
+        'found': len(times),
+        'discover_p50_ms': round(percentile(times, 0.5), 2),
+        'discover_max_ms': round(max(times, default=0), 2),
+        'requests_per_phone': round(sum(p.requests for p in phones) / clients, 2),
+    }
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument('--clients', type=int, default=8)
+    ap.add_argument('--lead', type=float, default=0.5, help='seconds phones search before the server starts')
+    ap.add_argument('--json', action='store_true')
+    args = ap.parse_args()
+
+    results = [run(mode, args.clients, args.lead) for mode in ('legacy', 'responder')]
+    if args.json:
+        print(json.dumps(results))
+        return
+    for r in results:
+        print(f"{r['mode']:>10}: {r['found']}/{r['clients']} found, p50 {r['discover_p50_ms']} ms, "
+              f"max {r['discover_max_ms']} ms, {r['requests_per_phone']} requests/phone")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,169 @@
+# Microbenchmark: legacy recvall framing vs. FrameReader (recv_into + memoryview).
+# Streams gamepad DATA frames (with a PING mixed in) over a local socketpair and
+# reports receive syscalls, allocations and CPU time per frame *applied* for each
+# path. The feeder writes one burst every --interval seconds, as a phone does,
+# rather than queueing the whole stream up front.
+#
+# For the comparison every DATA frame changes the button word, so FrameReader's
+# coalescing keeps all of them and both paths apply the same frames. A separate
+# row replays a stalled connection (whole stream queued, buttons steady) to show
+# coalescing on its own: applied vs. coalesced frames.
+#
+# Allocations are sys.getallocatedblocks() deltas across each read + decode step
+# while its frames are still referenced (gc off), i.e. the objects a frame costs;
+# temporaries freed inside the step don't show up. CPU comes from a separate run
+# without that accounting.
+#
+#   python bench/bench_framing.py [--frames 20000] [--burst 8] [--interval 0.0005]
+import argparse
+import gc
+import os
+import socket
+import sys
+import threading
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+from framing import FrameReader
+
+PING = b'\xF0'
+
+
+def data_frame(buttons):
+    # Buttons live at payload[4:6]
+    payload = bytearray(range(16))
+    payload[4], payload[5] = buttons & 0xFF, buttons >> 8
+    return b'\x01' + bytes(payload)
+
+
+class CountingSocket:
+    # Wraps a socket and counts the receive syscalls
+    def __init__(self, sock):
+        self.sock = sock
+        self.syscalls = 0
+
+    def recv(self, n):
+        self.syscalls += 1
+        return self.sock.recv(n)
+
+    def recv_into(self, view):
+        self.syscalls += 1
+        return self.sock.recv_into(view)
+
+    def fileno(self):
+        # FrameReader polls this when draining a backlog; count it like a recv
+        self.syscalls += 1
+        return self.sock.fileno()
+
+
+def legacy_recvall(sock, n):
+    # The original receiver.recvall loop
+    data = b''
+    while len(data) < n:
+        chunk = sock.recv(n - len(data))
+        if not chunk: return None
+        data += chunk
+    return data
+
+
+def run_legacy(sock, blocks):
+    stats = {'frames': 0, 'coalesced': 0, 'blocks': 0}
+    while True:
+        b0 = sys.getallocatedblocks() if blocks else 0
+        head = legacy_recvall(sock, 1)
+        if not head: break
+        payload = legacy_recvall(sock, 16) if head[0] == 0x01 else b''
+        if payload is None: break
+        if blocks: stats['blocks'] += sys.getallocatedblocks() - b0
+        stats['frames'] += 1
+        del head, payload
+    return stats
+
+
+def run_reader(sock, blocks):
+    stats = {'frames': 0, 'coalesced': 0, 'blocks': 0}
+    reader = FrameReader(sock)
+    while True:
+        b0 = sys.getallocatedblocks() if blocks else 0
+        if not reader.fill(): break
+        frames = reader.frames()
+        if blocks: stats['blocks'] += sys.getallocatedblocks() - b0
+        stats['frames'] += len(frames)
+        del frames
+    stats['coalesced'] = reader.data_skipped
+    return stats
+
+
+def feed(sock, frames, burst, interval, edges):
+    # Bursts of DATA frames model what the kernel has queued between reads. With
+    # edges the button word alternates across the whole stream (so two chunks when
+    # burst is odd); without, it never changes.
+    def chunk(first):
+        return b''.join(data_frame((first + i) & 1 if edges else 0) for i in range(burst)) + PING
+    chunks = [chunk(0), chunk(burst & 1)]
+    per_chunk = burst + 1
+    sent = n = 0
+    while sent < frames:
+        sock.sendall(chunks[n & 1])
+        sent += per_chunk
+        n += 1
+        if interval: time.sleep(interval)
+    sock.shutdown(socket.SHUT_WR)
+
+
+def run_once(runner, frames, burst, interval, edges, blocks):
+    a, b = socket.socketpair()
+    counted = CountingSocket(b)
+    t = threading.Thread(target=feed, args=(a, frames, burst, interval, edges), daemon=True)
+    if not interval: # stalled connection: everything is queued before the first read
+        a.setsockopt(socket.SOL_SOCKET, socket.SO_SNDBUF, 1 << 22)
+        b.setsockopt(socket.SOL_SOCKET, socket.SO_RCVBUF, 1 << 22)
+    if blocks: gc.disable()
+    t.start()
+    if not interval: t.join()
+    cpu0 = time.thread_time()
+    stats = runner(counted, blocks)
+    cpu = time.thread_time() - cpu0
+    if blocks: gc.enable()
+    t.join()
+    a.close(); b.close()
+    return stats, counted.syscalls, cpu
+
+
+def measure(name, runner, frames, burst, interval, edges):
+    stats, syscalls, cpu = run_once(runner, frames, burst, interval, edges, False)
+    counted, _, _ = run_once(runner, frames, burst, interval, edges, True)
+    n = max(1, stats['frames'])
+    return {
+        'path': name,
+        'applied': stats['frames'],
+        'coalesced': stats['coalesced'],
+        'syscalls_per_frame': syscalls / n,
+        'allocs_per_frame': counted['blocks'] / max(1, counted['frames']),
+        'cpu_us_per_frame': cpu / n * 1e6,
+    }
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument('--frames', type=int, default=20000)
+    ap.add_argument('--burst', type=int, default=8, help='DATA frames written per sendall')
+    ap.add_argument('--interval', type=float, default=0.0005, help='seconds between bursts')
+    args = ap.parse_args()
+
+    rows = [
+        ('recvall', run_legacy, args.interval, True),
+        ('FrameReader', run_reader, args.interval, True),
+        ('FR stalled', run_reader, 0, False), # coalescing on its own, not comparable
+    ]
+    print(f"{'path':<12}{'applied':>9}{'coalesced':>10}{'syscalls/f':>12}{'allocs/f':>10}{'cpu us/f':>10}")
+    for name, runner, interval, edges in rows:
+        r = measure(name, runner, args.frames, args.burst, interval, edges)
+        print(f"{r['path']:<12}{r['applied']:>9}{r['coalesced']:>10}{r['syscalls_per_frame']:>12.3f}"
+              f"{r['allocs_per_frame']:>10.3f}{r['cpu_us_per_frame']:>10.2f}")
+    print("Per frame applied. allocs/f = allocated-block delta per read+decode step while its"
+          " frames are alive (gc off); FR stalled queues the whole stream with steady buttons.")
+
+
+if __name__ == '__main__':
+    main()
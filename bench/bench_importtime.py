@@ -0,0 +1,95 @@
+# Startup import cost of the server modules, from `python -X importtime` in a
+# fresh interpreter per run (best of --runs). Reports the cumulative time of
+# each target, its slowest imports, and whether any dependency that should only
+# load on first use (QR stack, pynput, vgamepad) was pulled in at import.
+#
+#   python bench/bench_importtime.py [receiver gui_app] [--runs 5] [--top 10] [--json]
+import argparse
+import json
+import os
+import re
+import subprocess
+import sys
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..')
+LINE = re.compile(r'import time:\s+(\d+) \|\s+(\d+) \|( *)(\S+)')
+# Imported on INITIALIZE / first mouse or key event / first pad, never at startup
+DEFERRED = ('qrcode', 'PIL', 'pynput', 'vgamepad')
+
+
+def parse(stderr):
+    # -> [(module, self_us, cumulative_us, depth)]
+    rows = []
+    for line in stderr.splitlines():
+        m = LINE.match(line)
+        if m: rows.append((m.group(4), int(m.group(1)), int(m.group(2)), len(m.group(3)) // 2))
+    return rows
+
+
+def measure(module):
+    # -> rows, or an error string if the import failed (e.g. webview missing here)
+    # .pyc writing on, as in the frozen build: otherwise every run times the compiler
+    env = dict(os.environ)
+    env.pop('PYTHONDONTWRITEBYTECODE', None)
+    proc = subprocess.run([sys.executable, '-X', 'importtime', '-c', f'import {module}'],
+                          cwd=ROOT, env=env, capture_output=True, text=True)
+    rows = parse(proc.stderr)
+    if proc.returncode:
+        err = proc.stderr.strip().splitlines()
+        return rows, err[-1] if err else f'exit {proc.returncode}'
+    return rows, None
+
+
+def run(module, runs, top):
+    best = None
+    rows, error = measure(module) # warm-up, writes the .pyc files
+    for _ in range(runs):
+        rows, error = measure(module)
+        if error: break
+        total = next((cum for name, _, cum, depth in rows if name == module and depth == 0), None)
+        if total is None: continue
+        if best is None or total < best[0]: best = (total, rows)
+    if error or best is None:
+        return {'module': module, 'error': error or 'no importtime output'}
+    total, rows = best
+    # Only the target's subtree (children are printed before their parent), not
+    # the interpreter's own startup imports
+    end = max(i for i, r in enumerate(rows) if r[0] == module and r[3] == 0)
+    start = end
+    while start > 0 and rows[start - 1][3] > 0: start -= 1
+    mine = rows[start:end + 1]
+    seen = {r[0] for r in mine}
+    return {
+        'module': module,
+        'total_ms': round(total / 1000, 2),
+        'modules': len(mine),
+        'deferred_loaded': sorted(d for d in DEFERRED if any(n == d or n.startswith(d + '.') for n in seen)),
+        'slowest': [{'module': n, 'self_ms': round(s / 1000, 2), 'cumulative_ms': round(c / 1000, 2)}
+                    for n, s, c, _ in sorted(mine, key=lambda r: -r[1])[:top]],
+    }
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument('modules', nargs='*', default=['receiver', 'gui_app'])
+    ap.add_argument('--runs', type=int, default=5)
+    ap.add_argument('--top', type=int, default=10)
+    ap.add_argument('--json', action='store_true')
+    args = ap.parse_args()
+
+    results = [run(m, args.runs, args.top) for m in args.modules]
+    if args.json:
+        print(json.dumps(results))
+        return
+    for r in results:
+        if 'error' in r:
+            print(f"{r['module']}: import failed ({r['error']})")
+            continue
+        eager = ', '.join(r['deferred_loaded']) or 'none'
+        print(f"{r['module']}: {r['total_ms']} ms, {r['modules']} modules, deferred deps loaded at import: {eager}")
+        for s in r['slowest']:
+            print(f"  {s['self_ms']:>8.2f} ms self {s['cumulative_ms']:>8.2f} ms cum  {s['module']}")
+
+
+if __name__ == '__main__':
+    main()
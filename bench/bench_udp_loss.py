@@ -0,0 +1,104 @@
+# Loopback harness for the UDP DATA channel under simulated loss and reordering.
+# A sender streams sequenced frames at a fixed rate through a lossy shim into
+# udp_input.UdpInput; the harness reports delivery, stale drops and the latency
+# of every applied frame (send -> on_frame) plus the age of the applied state.
+#
+#   python bench/bench_udp_loss.py [--rate 250] [--seconds 5] [--loss 0.05] [--reorder 0.05]
+import argparse
+import heapq
+import os
+import random
+import socket
+import struct
+import sys
+import threading
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+from udp_input import UdpInput, HEADER
+
+STAMP = struct.Struct('>d') # send time, stored in payload bytes 8..15 for the harness
+
+
+def percentile(values, q):
+    if not values: return 0.0
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * q))]
+
+
+def run(rate, seconds, loss, reorder, delay_ms, slot=0):
+    applied = []
+    newest_sent = [0.0]
+
+    def on_frame(s, addr, payload):
+        now = time.perf_counter()
+        sent = STAMP.unpack_from(payload, 8)[0]
+        # latency of this frame, and how far the applied state lags the newest frame sent
+        applied.append((now - sent, max(0.0, newest_sent[0] - sent)))
+        return s == slot
+
+    rx = UdpInput(on_frame, port=0, host='127.0.0.1')
+    rx.start()
+    tx = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+    dest = ('127.0.0.1', rx.port)
+
+    rng = random.Random(1)
+    delayed = [] # (release_time, seq, packet) for reordered datagrams
+    payload = bytearray(16)
+    interval = 1.0 / rate
+    sent = lost = held = 0
+    start = time.perf_counter()
+    next_t = start
+    seq = rng.randrange(1 << 32) # exercise wrap-around too
+    while next_t - start < seconds:
+        now = time.perf_counter()
+        while delayed and delayed[0][0] <= now:
+            tx.sendto(heapq.heappop(delayed)[2], dest)
+        if now < next_t:
+            time.sleep(min(next_t - now, 0.001))
+            continue
+        seq = (seq + 1) & 0xFFFFFFFF
+        STAMP.pack_into(payload, 8, now)
+        newest_sent[0] = now
+        pkt = HEADER.pack(0x01, slot, seq) + bytes(payload)
+        sent += 1
+        r = rng.random()
+        if r < loss:
+            lost += 1
+        elif r < loss + reorder:
+            held += 1
+            heapq.heappush(delayed, (now + delay_ms / 1000.0, seq, pkt))
+        else:
+            tx.sendto(pkt, dest)
+        next_t += interval
+    for _, _, pkt in sorted(delayed): tx.sendto(pkt, dest)
+    time.sleep(0.2)
+    rx.close()
+    tx.close()
+
+    lat = [a for a, _ in applied]
+    age = [b for _, b in applied]
+    st = rx.stats()
+    return {
+        'sent': sent, 'sim_lost': lost, 'sim_reordered': held,
+        'received': st['received'], 'applied': st['accepted'], 'stale_dropped': st['stale'],
+        'lat_p50_ms': percentile(lat, 0.5) * 1e3, 'lat_p99_ms': percentile(lat, 0.99) * 1e3,
+        'state_age_p99_ms': percentile(age, 0.99) * 1e3,
+    }
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument('--rate', type=int, default=250, help='frames per second')
+    ap.add_argument('--seconds', type=float, default=5)
+    ap.add_argument('--loss', type=float, default=0.05)
+    ap.add_argument('--reorder', type=float, default=0.05)
+    ap.add_argument('--delay-ms', type=float, default=30, help='extra delay for reordered datagrams')
+    args = ap.parse_args()
+    r = run(args.rate, args.seconds, args.loss, args.reorder, args.delay_ms)
+    for k, v in r.items():
+        print(f"{k:<18}{v:>10.3f}" if isinstance(v, float) else f"{k:<18}{v:>10}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,215 @@
+# Synthetic multi-client load generator for the receiver's TCP server.
+# Starts receiver.start_server in-process on a stub (null) backend, opens N
+# simulated phones that do the HELLO handshake and then stream 0x01 frames at a
+# fixed rate mixed with PING, MOUSE and TEXT traffic, and reports throughput,
+# lost/late frames, server CPU and per-frame latency.
+#
+#   python bench/loadgen.py --clients 4 --rate 250 --seconds 10 [--mode selector]
+import argparse
+import json
+import os
+import socket
+import struct
+import sys
+import threading
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+import backends
+import receiver
+
+PING_INTERVAL = 1.0
+
+
+class SimClient:
+    def __init__(self, idx, host, port, rate, seconds, mouse_every, text_every):
+        self.idx = idx
+        self.host = host
+        self.port = port
+        self.rate = rate
+        self.seconds = seconds
+        self.mouse_every = mouse_every
+        self.text_every = text_every
+        self.sock = None
+        self.lock = threading.Lock()
+        self.connected = False
+        self.ready = threading.Event()
+        self.handshake_ms = 0.0
+        self.sent = 0
+        self.late = 0
+        self.rtts = []
+        self.ping_sent_at = 0.0
+        self.cpu = 0.0 # thread CPU of this client's sender + reader, subtracted from process CPU
+
+    def send(self, data):
+        with self.lock: self.sock.sendall(data)
+
+    def read_loop(self):
+        cpu0 = time.thread_time()
+        try:
+            while True:
+                h = self.sock.recv(1)
+                if not h: break
+                if h == b'\x11':
+                    self.ready.set()
+                elif h == b'\xF1':
+                    self.rtts.append((time.perf_counter() - self.ping_sent_at) * 1e3)
+                elif h == b'\x03':
+                    self.sock.recv(2)
+        except OSError: pass
+        self.cpu += time.thread_time() - cpu0
+
+    def run(self):
+        cpu0 = time.thread_time()
+        try:
+            self.sock = socket.create_connection((self.host, self.port))
+        except OSError as e:
+            print(f"client {self.idx}: connect failed: {e}")
+            return
+        self.sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        reader = threading.Thread(target=self.read_loop, daemon=True)
+        reader.start()
+
+        t0 = time.perf_counter()
+        self.send(b'\x10')
+        if not self.ready.wait(2.0):
+            print(f"client {self.idx}: no READY (server full?)")
+            self.sock.close()
+            return
+        self.connected = True
+        self.handshake_ms = (time.perf_counter() - t0) * 1e3
+
+        interval = 1.0 / self.rate
+        start = time.perf_counter()
+        next_t = start
+        next_ping = start
+        frame = bytearray(17)
+        frame[0] = 0x01
+        n = 0
+        while True:
+            now = time.perf_counter()
+            if now - start >= self.seconds: break
+            if now < next_t:
+                time.sleep(next_t - now)
+                continue
+            if now - next_t > interval: self.late += 1 # fell more than one frame behind schedule
+
+            # Sweep the left stick and toggle A so frames differ and reach the backend
+            frame[1] = n & 0xFF
+            frame[5] = (n >> 4) & 1
+            struct.pack_into('>I', frame, 13, int(time.time() * 1000) & 0xFFFFFFFF)
+            out = bytes(frame)
+            if self.mouse_every and n % self.mouse_every == 0:
+                out += b'\x04\x01\xff\x00'
+            if self.text_every and n % self.text_every == 0:
+                out += b'\x02\x05hello'
+            if now >= next_ping:
+                self.ping_sent_at = now
+                out += b'\xF0'
+                next_ping += PING_INTERVAL
+            try: self.send(out)
+            except OSError: break
+            self.sent += 1
+            n += 1
+            next_t += interval
+        self.cpu += time.thread_time() - cpu0
+
+    def close(self):
+        if self.sock:
+            try: self.sock.shutdown(socket.SHUT_RDWR)
+            except OSError: pass
+            self.sock.close()
+
+
+def percentile(values, q):
+    if not values: return 0.0
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * q))]
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument('--clients', type=int, default=4)
+    ap.add_argument('--rate', type=int, default=250, help='DATA frames per second per client')
+    ap.add_argument('--seconds', type=float, default=10)
+    ap.add_argument('--mode', choices=('threaded', 'selector'), default='threaded')
+    ap.add_argument('--port', type=int, default=16000)
+    ap.add_argument('--mouse-every', type=int, default=10, help='send a MOUSE frame every N DATA frames (0 = off)')
+    ap.add_argument('--text-every', type=int, default=250, help='send a TEXT frame every N DATA frames (0 = off)')
+    ap.add_argument('--players', type=int, help='server slot capacity (default: --clients)')
+    ap.add_argument('--prewarm', type=int, default=0, help='X360 pads to pool before clients connect')
+    ap.add_argument('--record', metavar='PATH', help='record the server side for bench/replay.py')
+    ap.add_argument('--json', action='store_true')
+    args = ap.parse_args()
+
+    receiver.output_backend = backends.get_backend('null')
+    receiver.set_capacity(args.players or args.clients)
+    receiver.PREWARM['x360'] = args.prewarm
+    receiver.TCP_PORT = args.port
+    receiver.UDP_INPUT_PORT = args.port
+    receiver.setup_adb = lambda: None
+    if args.record: receiver.start_recording(args.record)
+    server = threading.Thread(target=receiver.start_server, kwargs={'ip_bind': '127.0.0.1', 'mode': args.mode}, daemon=True)
+    server.start()
+    time.sleep(0.5)
+
+    clients = [SimClient(i, '127.0.0.1', args.port, args.rate, args.seconds, args.mouse_every, args.text_every)
+               for i in range(args.clients)]
+    threads = [threading.Thread(target=c.run, daemon=True) for c in clients]
+    frames0 = receiver.get_update_counters()['frames']
+    cpu0 = time.process_time()
+    wall0 = time.perf_counter()
+    for t in threads: t.start()
+    for t in threads: t.join()
+    time.sleep(0.3) # let the server drain
+    wall = time.perf_counter() - wall0
+
+    # Snapshot server-side numbers before the clients disconnect and sessions reset
+    processed = receiver.get_update_counters()['frames'] - frames0
+    counters = receiver.get_update_counters()
+    latency = receiver.get_latency_report()
+    pool = receiver.get_pool_stats()
+    text = receiver.get_text_stats()
+    stages = [s for s in receiver.get_player_latency() if s]
+    for c in clients: c.close()
+    time.sleep(0.2)
+    server_cpu = (time.process_time() - cpu0) - sum(c.cpu for c in clients)
+    receiver.stop_server()
+    receiver.stop_recording()
+
+    sent = sum(c.sent for c in clients)
+    rtts = [r for c in clients for r in c.rtts]
+    result = {
+        'mode': args.mode,
+        'clients': args.clients,
+        'connected': sum(1 for c in clients if c.connected),
+        'target_fps': args.rate * args.clients,
+        'sent_fps': round(sent / wall, 1),
+        'processed_fps': round(processed / wall, 1),
+        'frames_sent': sent,
+        'frames_processed': processed,
+        'frames_coalesced': counters['skipped'],
+        'frames_edge_kept': counters['edges'],
+        'frames_lost': max(0, sent - processed - counters['skipped']),
+        'frames_late': sum(c.late for c in clients),
+        'server_cpu_pct': round(server_cpu / wall * 100, 1),
+        'server_cpu_us_per_frame': round(server_cpu / max(1, processed) * 1e6, 2),
+        'frame_p50_us': latency['p50_us'],
+        'frame_p99_us': latency['p99_us'],
+        'total_p95_ms': max((s['total']['p95'] for s in stages), default=0),
+        'pool_hits': pool['hits'],
+        'pool_misses': pool['misses'],
+        'text_queue_max': text['max_depth'],
+        'text_batches': text['batches'],
+        'handshake_ms_max': round(max((c.handshake_ms for c in clients), default=0), 2),
+        'ping_rtt_p50_ms': round(percentile(rtts, 0.5), 3),
+        'ping_rtt_p99_ms': round(percentile(rtts, 0.99), 3),
+    }
+    if args.json:
+        print(json.dumps(result))
+    else:
+        for k, v in result.items(): print(f"{k:<26}{v}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,102 @@
+# Replays a session recording (receiver.py --record PATH) through
+# process_gamepad_data into any output backend: at the original pace, scaled
+# (--speed 4), or as fast as possible (--speed 0) for regression runs on real
+# traffic. Only pad-affecting frames are applied (DATA, HELLO/HELLO_EX for the
+# controller type, session close); TEXT/MOUSE/SCROLL are counted but not sent
+# to the host, and mouse mode is off unless --inject is given.
+#
+#   python bench/replay.py session.nxrec [--speed 1] [--backend null] [--json]
+import argparse
+import json
+import os
+import sys
+import time
+from collections import Counter
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+import backends
+import receiver
+import recorder
+from framing import OP_HELLO_EX, TLV_CONTROLLER, CONTROLLER_KINDS, parse_tlv
+
+
+def percentile(values, q):
+    if not values: return 0.0
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * q))]
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument('path')
+    ap.add_argument('--speed', type=float, default=1.0, help='playback speed, 0 = as fast as possible')
+    ap.add_argument('--backend', default='null', choices=sorted(backends.BACKENDS))
+    ap.add_argument('--inject', action='store_true', help='let mouse mode and key remaps reach this machine')
+    ap.add_argument('--json', action='store_true')
+    args = ap.parse_args()
+
+    records = list(recorder.read_records(args.path))
+    if not records:
+        print("Empty recording")
+        return
+    slots = max(r[1] for r in records) + 1
+
+    receiver.output_backend = backends.get_backend(args.backend)
+    receiver.gamepad_pool = backends.GamepadPool(receiver.output_backend)
+    receiver.set_capacity(max(slots, 1))
+    if not args.inject: receiver.HAS_KEYBOARD = False
+    players = receiver.players
+
+    ops = Counter()
+    frame_us = []
+
+    def apply(slot, op, payload):
+        ops[op] += 1
+        player = players[slot]
+        if op == 0x01:
+            t0 = time.perf_counter()
+            receiver.process_gamepad_data(player, payload, t0)
+            frame_us.append((time.perf_counter() - t0) * 1e6)
+        elif op == OP_HELLO_EX:
+            ctype = parse_tlv(payload).get(TLV_CONTROLLER)
+            player.kind = CONTROLLER_KINDS.get(ctype[0]) if ctype else None
+            player.get_gamepad()
+        elif op == 0x10:
+            player.get_gamepad()
+        elif op == recorder.EV_CLOSE:
+            player.neutral()
+
+    updates0 = receiver.get_update_counters()['driver_updates']
+    wall0 = time.perf_counter()
+    lateness = recorder.replay(records, apply, args.speed)
+    wall = time.perf_counter() - wall0
+
+    span = (records[-1][0] - records[0][0]) / 1e9
+    data = ops[0x01]
+    result = {
+        'frames': len(records),
+        'data_frames': data,
+        'other_ops': {f'0x{op:02x}': n for op, n in sorted(ops.items()) if op != 0x01},
+        'players': slots,
+        'recorded_s': round(span, 3),
+        'replay_s': round(wall, 3),
+        'speed': args.speed,
+        'data_fps': round(data / wall, 1) if wall else 0.0,
+        'driver_updates': receiver.get_update_counters()['driver_updates'] - updates0,
+        'frame_p50_us': round(percentile(frame_us, 0.5), 2),
+        'frame_p99_us': round(percentile(frame_us, 0.99), 2),
+        'late_p99_ms': round(percentile(lateness, 0.99) * 1000, 3),
+        'late_max_ms': round(max(lateness, default=0) * 1000, 3),
+    }
+    if args.backend == 'recording':
+        # Final pad states, to diff two runs of the same recording
+        result['final_states'] = [p.gamepad.state if p.gamepad else None for p in players]
+    if args.json:
+        print(json.dumps(result))
+        return
+    for k, v in result.items():
+        print(f"{k:>16}: {v}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,91 @@
+# --- DATA frame decoding ---
+# Everything a frame needs is precomputed here once at import, so the per-frame
+# cost is one struct unpack plus table lookups.
+#
+# DATA payload (16 bytes, after the 0x01 opcode):
+#   lx ly rx ry      signed bytes (-127..127)
+#   btns_low btns_high lt rt
+#   roll pitch       big endian int16 (gyro)
+#   timestamp        u32 BE client clock in ms, 0 if the client doesn't send one
+import struct
+
+FRAME = struct.Struct('>8B2hI')
+FRAME_SIZE = FRAME.size
+
+MOUSE_MODE_BIT = 0x40 # btns_high flag, not a controller button
+BUTTON_MASK = 0x3FFF  # btns_low | btns_high << 8, mapped buttons only
+
+
+def decode_frame(data):
+    # -> (lx, ly, rx, ry, btns_low, btns_high, lt, rt, roll, pitch, timestamp), sticks as raw bytes
+    return FRAME.unpack_from(data)
+
+
+def map_stick(val):
+    # -127..127 -> -1.0..1.0 -> Int16
+    norm = val / 127.0
+    if norm > 1.0: norm = 1.0
+    if norm < -1.0: norm = -1.0
+    return norm, int(norm * 32000)
+
+
+# Raw byte (0..255) -> signed value, stick (float, int16) and dashboard visual.
+# The _INV tables carry the Y axis inversion games expect.
+SIGNED = tuple(b - 256 if b > 127 else b for b in range(256))
+STICK = tuple(map_stick(v) for v in SIGNED)
+STICK_INV = tuple((-f, -i) for f, i in STICK)
+STICK_FLOAT = tuple(f for f, _ in STICK)
+STICK_FLOAT_INV = tuple(f for f, _ in STICK_INV)
+STICK_INT = tuple(i for _, i in STICK)
+STICK_INT_INV = tuple(i for _, i in STICK_INV)
+VISUAL = tuple(v / 127.0 for v in SIGNED)
+VISUAL_INV = tuple(-v for v in VISUAL)
+TRIGGER_VISUAL = tuple(v / 255.0 for v in range(256))
+
+# Bit index in (btns_low | btns_high << 8) -> logical button name
+BUTTON_BITS = (
+    'a', 'b', 'x', 'y', 'lb', 'rb', 'select', 'start',
+    'ls', 'rs', 'up', 'down', 'left', 'right'
+)
+
+# Per controller type enum member names, in BUTTON_BITS order
+X360_BUTTON_NAMES = (
+    'XUSB_GAMEPAD_A', 'XUSB_GAMEPAD_B', 'XUSB_GAMEPAD_X', 'XUSB_GAMEPAD_Y',
+    'XUSB_GAMEPAD_LEFT_SHOULDER', 'XUSB_GAMEPAD_RIGHT_SHOULDER', 'XUSB_GAMEPAD_BACK', 'XUSB_GAMEPAD_START',
+    'XUSB_GAMEPAD_LEFT_THUMB', 'XUSB_GAMEPAD_RIGHT_THUMB',
+    'XUSB_GAMEPAD_DPAD_UP', 'XUSB_GAMEPAD_DPAD_DOWN', 'XUSB_GAMEPAD_DPAD_LEFT', 'XUSB_GAMEPAD_DPAD_RIGHT'
+)
+# DS4 has no d-pad buttons; bits 10..13 go through DS4_DPAD_NAMES instead
+DS4_BUTTON_NAMES = (
+    'DS4_BUTTON_CROSS', 'DS4_BUTTON_CIRCLE', 'DS4_BUTTON_SQUARE', 'DS4_BUTTON_TRIANGLE',
+    'DS4_BUTTON_SHOULDER_LEFT', 'DS4_BUTTON_SHOULDER_RIGHT', 'DS4_BUTTON_SHARE', 'DS4_BUTTON_OPTIONS',
+    'DS4_BUTTON_THUMB_LEFT', 'DS4_BUTTON_THUMB_RIGHT'
+)
+DPAD_SHIFT = 10
+DPAD_MASK = 0xF << DPAD_SHIFT
+
+
+def _dpad_name(nibble):
+    # nibble = up | down << 1 | left << 2 | right << 3; opposite pairs cancel out
+    v = (nibble & 1) - ((nibble >> 1) & 1)
+    h = ((nibble >> 3) & 1) - ((nibble >> 2) & 1)
+    return {
+        (1, 0): 'NORTH', (1, 1): 'NORTHEAST', (0, 1): 'EAST', (-1, 1): 'SOUTHEAST',
+        (-1, 0): 'SOUTH', (-1, -1): 'SOUTHWEST', (0, -1): 'WEST', (1, -1): 'NORTHWEST',
+        (0, 0): 'NONE'
+    }[(v, h)]
+
+DS4_DPAD_NAMES = tuple('DS4_BUTTON_DPAD_' + _dpad_name(n) for n in range(16))
+
+
+def button_table(enum_cls, names):
+    # Resolve a name list against a vgamepad button enum -> tuple indexed by bit
+    return tuple(getattr(enum_cls, n) for n in names)
+
+
+def iter_bits(word):
+    # Bit indices set in word, lowest first
+    while word:
+        low = word & -word
+        yield low.bit_length() - 1
+        word ^= low
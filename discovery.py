@@ -0,0 +1,222 @@
+# --- LAN discovery (UDP 6001) ---
+# Phones broadcast DISCOVER_CONTROLLER and take the reply's source address as the
+# server IP, so the reply has to leave from the interface that faces the phone;
+# a single wildcard socket answers from the default route, which is wrong on PCs
+# with VPN / Hyper-V / second NICs. The responder keeps one reply socket per
+# local address with its payload built once, picks the interface per requester
+# (route lookup, cached), and multicasts + broadcasts an announcement on every
+# interface at start and whenever the local addresses change, so a phone already
+# listening finds the PC without asking. One bad packet or a transient socket
+# error never stops the loop; a dead listener is rebound.
+import socket
+import threading
+import time
+
+import netinfo
+
+DISCOVERY_PORT = 6001
+ANNOUNCE_PORT = 6002 # phones listen here for unsolicited announcements
+ANNOUNCE_GROUP = "239.255.60.1" # site-local multicast, TTL 1
+REQUEST = b'DISCOVER_CONTROLLER'
+REPLY_PREFIX = b'PC_SERVER:'
+ROUTE_CACHE = 256 # requester -> interface entries
+RECHECK_INTERVAL = 1.0 # seconds between interface-change checks (netinfo rate-limits the real work)
+
+
+def reply_payload(name):
+    return REPLY_PREFIX + name.encode('utf-8', 'replace')
+
+
+def route_source(addr):
+    # Local address the OS would use to reach addr; UDP connect() sends nothing
+    s = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+    try:
+        s.connect((addr, DISCOVERY_PORT))
+        return s.getsockname()[0]
+    except OSError: return None
+    finally: s.close()
+
+
+class DiscoveryResponder:
+    def __init__(self, port=DISCOVERY_PORT, host='0.0.0.0', name=None, announce_port=ANNOUNCE_PORT,
+                 group=ANNOUNCE_GROUP, announce_targets=None, ips=None):
+        # announce_targets/ips override where announcements go and which local
+        # addresses get reply sockets (benchmarks, tests); default = every LAN address
+        self.port = port
+        self.host = host
+        self.name = name or socket.gethostname()
+        self.announce_port = announce_port
+        self.group = group
+        self.announce_targets = announce_targets
+        self.fixed_ips = ips
+        self.sock = None
+        self.running = False
+        self.thread = None
+        self.lock = threading.Lock()
+        self.interfaces = {} # local ip -> (reply socket, payload)
+        self.ips = set() # local addresses last synced (some may have no reply socket)
+        self.routes = {} # requester ip -> local ip, insertion order = age
+        self.payload = reply_payload(self.name)
+
+        # Stats
+        self.requests = 0
+        self.replies = 0
+        self.ignored = 0
+        self.errors = 0
+        self.rebinds = 0
+        self.announcements = 0
+        self.interface_changes = 0
+
+    # --- Sockets ---
+    def _bind_listener(self):
+        sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        sock.setsockopt(socket.SOL_SOCKET, socket.SO_BROADCAST, 1)
+        sock.bind((self.host, self.port))
+        sock.settimeout(RECHECK_INTERVAL)
+        self.port = sock.getsockname()[1]
+        return sock
+
+    def _reply_socket(self, ip):
+        s = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        try:
+            s.setsockopt(socket.SOL_SOCKET, socket.SO_BROADCAST, 1)
+            s.setsockopt(socket.IPPROTO_IP, socket.IP_MULTICAST_TTL, 1)
+            s.setsockopt(socket.IPPROTO_IP, socket.IP_MULTICAST_IF, socket.inet_aton(ip))
+            s.bind((ip, 0))
+            return s
+        except OSError:
+            s.close()
+            return None
+
+    def _local_ips(self):
+        if self.fixed_ips is not None: return list(self.fixed_ips)
+        return [ip for ip in netinfo.local_ips() if not ip.startswith("127.")]
+
+    def _sync_interfaces(self):
+        # -> True when the set of local addresses changed (reply sockets rebuilt)
+        ips = set(self._local_ips())
+        with self.lock:
+            if ips == self.ips: return False
+            for ip in set(self.interfaces) - ips:
+                self.interfaces.pop(ip)[0].close()
+            for ip in ips - set(self.interfaces):
+                s = self._reply_socket(ip)
+                if s: self.interfaces[ip] = (s, self.payload)
+            self.ips = ips
+            self.routes.clear()
+        return True
+
+    def _drop_interface(self, ip):
+        # Reply socket failed (address gone or changed): forget it and every
+        # cached route; the next sync rebinds it if the address is still there
+        with self.lock:
+            entry = self.interfaces.pop(ip, None)
+            if entry: entry[0].close()
+            self.ips.discard(ip)
+            self.routes.clear()
+
+    # --- Announcements ---
+    def announce(self):
+        # Multicast + limited broadcast out of every interface
+        with self.lock: socks = [s for s, _ in self.interfaces.values()]
+        if not socks and self.sock: socks = [self.sock]
+        targets = self.announce_targets or [(self.group, self.announce_port), ('255.255.255.255', self.announce_port)]
+        for s in socks:
+            for t in targets:
+                try:
+                    s.sendto(self.payload, t)
+                    self.announcements += 1
+                except OSError: self.errors += 1
+
+    # --- Replies ---
+    def _reply_via(self, addr):
+        # -> (local ip, socket, payload) facing the requester; the listener itself
+        # (local ip None) as a fallback
+        ip = addr[0]
+        with self.lock:
+            local = self.routes.get(ip)
+            if local is None:
+                local = route_source(ip)
+                if len(self.routes) >= ROUTE_CACHE: del self.routes[next(iter(self.routes))]
+                self.routes[ip] = local
+            entry = self.interfaces.get(local)
+        if entry: return (local,) + entry
+        return None, self.sock, self.payload
+
+    def handle(self, data, addr):
+        if data != REQUEST:
+            self.ignored += 1
+            return
+        self.requests += 1
+        local, sock, payload = self._reply_via(addr)
+        try: sock.sendto(payload, addr)
+        except OSError:
+            if local is None: raise
+            # Stale route to an address this PC no longer has: answer from the listener
+            self.errors += 1
+            self._drop_interface(local)
+            self.sock.sendto(self.payload, addr)
+        self.replies += 1
+
+    def _run(self):
+        next_check = time.monotonic() + RECHECK_INTERVAL
+        while self.running:
+            sock = self.sock
+            try:
+                data, addr = sock.recvfrom(1024)
+                self.handle(data, addr)
+            except socket.timeout: pass
+            except OSError:
+                # Windows reports an earlier reply's ICMP port-unreachable here
+                # (WSAECONNRESET); closed sockets land here too on stop()
+                if not self.running: break
+                self.errors += 1
+                if sock.fileno() == -1: self._rebind()
+            except Exception as e:
+                self.errors += 1
+                print(f"Discovery Error: {e}")
+            if time.monotonic() >= next_check:
+                next_check = time.monotonic() + RECHECK_INTERVAL
+                try:
+                    if self._sync_interfaces():
+                        self.interface_changes += 1
+                        self.announce()
+                except Exception as e: print(f"Discovery Error: {e}")
+
+    def _rebind(self):
+        delay = 0.5
+        while self.running:
+            try:
+                self.sock = self._bind_listener()
+                self.rebinds += 1
+                return
+            except OSError as e:
+                print(f"Discovery rebind failed: {e}")
+                time.sleep(delay)
+                delay = min(5.0, delay * 2)
+
+    def start(self):
+        self.sock = self._bind_listener()
+        self.running = True
+        self._sync_interfaces()
+        self.announce()
+        self.thread = threading.Thread(target=self._run, name="discovery", daemon=True)
+        self.thread.start()
+        return self.port
+
+    def close(self):
+        self.running = False
+        if self.sock:
+            try: self.sock.close()
+            except OSError: pass
+        with self.lock:
+            for s, _ in self.interfaces.values(): s.close()
+            self.interfaces.clear()
+            self.ips = set()
+
+    def stats(self):
+        return {
+            'requests': self.requests, 'replies': self.replies, 'ignored': self.ignored,
+            'errors': self.errors, 'rebinds': self.rebinds, 'announcements': self.announcements,
+            'interfaces': sorted(self.interfaces), 'interface_changes': self.interface_changes
+        }
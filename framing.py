@@ -0,0 +1,155 @@
+# --- Wire framing for the TCP control/input stream ---
+# Every frame is a 1-byte opcode followed by a fixed payload, except TEXT and
+# HELLO_EX which carry their own length byte.
+import select
+
+import metrics
+
+# Payload length per opcode (TEXT/HELLO_EX are length-prefixed and handled separately)
+FRAME_SIZES = {
+    0x10: 0,  # HELLO
+    0x01: 16, # DATA
+    0xF0: 0,  # PING
+    0x04: 3,  # MOUSE
+    0x05: 2,  # SCROLL
+    0x06: 0,  # UDP_BIND
+}
+OP_DATA = 0x01
+OP_TEXT = 0x02
+OP_HELLO_EX = 0x12 # [len][TLV...], answered with READY + SESSION
+OP_SESSION = 0x13  # server -> phone: [slot][resumed][token x8]
+
+# HELLO_EX TLV types: [type][len][value]
+TLV_TOKEN = 0x01 # 8-byte session token from an earlier SESSION, to resume
+TLV_CONTROLLER = 0x02 # 1 byte: requested pad type, see CONTROLLER_KINDS
+CONTROLLER_KINDS = {1: 'x360', 2: 'ds4'} # anything else = server default
+TOKEN_SIZE = 8
+
+# Opcode -> payload length lookup (-1 = unknown, -2 = length-prefixed) so the
+# split loop is a single list index instead of dict + membership checks
+_SIZES = [-1] * 256
+for _op, _n in FRAME_SIZES.items(): _SIZES[_op] = _n
+_SIZES[OP_TEXT] = -2
+_SIZES[OP_HELLO_EX] = -2
+
+MAX_BUFFER = 64 * 1024 # how far the buffer may grow while draining a backlog
+
+RX_BYTES = metrics.counter('nexus_rx_bytes_total', 'Bytes received from phones', label='transport')
+
+
+class FrameReader:
+    # Per-connection decoder over one preallocated buffer. fill() does a single
+    # recv_into for whatever the kernel has; frames() splits out every complete
+    # frame as (opcode, memoryview) without copying. Payload views are only
+    # valid until the next fill().
+    #
+    # After a network stall the kernel holds a burst of stale DATA frames; fill()
+    # drains all of it in one go and frames() applies only the newest, keeping
+    # the frames where the button word changes so short presses survive.
+    def __init__(self, sock, size=4096):
+        self.sock = sock
+        self.buf = bytearray(size)
+        self.view = memoryview(self.buf)
+        self.start = 0
+        self.end = 0
+        self.buttons = 0 # button bytes of the last DATA frame seen, for edge detection
+        self.data_skipped = 0 # DATA frames superseded by a newer one in the same batch
+        self.data_edges = 0 # superseded DATA frames still applied because buttons changed
+        self.drains = 0 # fills that found a backlog beyond one recv
+
+    def _readable(self):
+        try: return bool(select.select([self.sock], [], [], 0)[0])
+        except (OSError, ValueError): return False
+
+    def fill(self):
+        # Compact the leftover partial frame to the front when the tail gets short
+        if self.start == self.end:
+            self.start = self.end = 0
+        elif len(self.buf) - self.end < 512:
+            n = self.end - self.start
+            self.view[:n] = self.view[self.start:self.end]
+            self.start, self.end = 0, n
+        n = self.sock.recv_into(self.view[self.end:])
+        if not n: return False
+        self.end += n
+        RX_BYTES.inc('tcp', n)
+
+        # A recv that filled the buffer may have left more behind: keep reading
+        # (growing up to MAX_BUFFER) until the socket is empty. EOF found here
+        # shows up on the next fill().
+        if self.end == len(self.buf) and self._readable():
+            self.drains += 1
+            while True:
+                if self.start:
+                    n = self.end - self.start
+                    self.view[:n] = self.view[self.start:self.end]
+                    self.start, self.end = 0, n
+                elif len(self.buf) < MAX_BUFFER:
+                    self.buf = self.buf + bytes(len(self.buf))
+                    self.view = memoryview(self.buf)
+                else: break
+                n = self.sock.recv_into(self.view[self.end:])
+                if not n: break
+                self.end += n
+                RX_BYTES.inc('tcp', n)
+                if self.end < len(self.buf) or not self._readable(): break
+        return True
+
+    def frames(self):
+        # Control frames in arrival order, then the DATA frames that change the
+        # buttons, then the newest DATA frame
+        buf, view, sizes = self.buf, self.view, _SIZES
+        pos, end = self.start, self.end
+        out = []
+        edges = None
+        latest = None
+        buttons = self.buttons
+        while pos < end:
+            h = buf[pos]
+            n = sizes[h]
+            if n >= 0:
+                flen = 1 + n
+                if pos + flen > end: break
+                if h == OP_DATA:
+                    if latest is not None:
+                        if latest_edge:
+                            if edges is None: edges = []
+                            edges.append((OP_DATA, latest))
+                            self.data_edges += 1
+                        else:
+                            self.data_skipped += 1
+                    latest = view[pos + 1:pos + flen]
+                    # Buttons live at payload[4:6] (low, high incl. the mouse-mode flag)
+                    b = buf[pos + 5] | buf[pos + 6] << 8
+                    latest_edge = b != buttons
+                    buttons = b
+                else:
+                    out.append((h, view[pos + 1:pos + flen]))
+            elif n == -2:
+                if pos + 2 > end: break
+                flen = 2 + buf[pos + 1]
+                if pos + flen > end: break
+                out.append((h, view[pos + 2:pos + flen]))
+            else:
+                flen = 1 # Unknown opcode, skip the byte
+            pos += flen
+        self.start = pos
+        self.buttons = buttons
+        if edges: out.extend(edges)
+        if latest is not None: out.append((OP_DATA, latest))
+        return out
+
+    def pending(self):
+        return self.end - self.start
+
+
+def parse_tlv(payload):
+    # -> {type: bytes}; a truncated trailing entry is ignored
+    out = {}
+    pos, end = 0, len(payload)
+    while pos + 2 <= end:
+        t, n = payload[pos], payload[pos + 1]
+        if pos + 2 + n > end: break
+        out[t] = bytes(payload[pos + 2:pos + 2 + n])
+        pos += 2 + n
+    return out
@@ -1,42 +1,45 @@
 import webview
 import threading
-import sys
 import os
-import socket
 import json
 import time
-import base64
-from io import BytesIO
-import qrcode
-try:
-    import receiver
-except Exception as e:
-    # Handle missing ViGEmBus Driver
-    if "VIGEM" in str(e) or "VBus" in str(e):
-        error_html = f"""
-        <!DOCTYPE html>
-        <html>
-        <body style="background-color: #121212; color: #e0e0e0; font-family: sans-serif; display: flex; flex-direction: column; align-items: center; justify-content: center; height: 100vh; padding: 20px; text-align: center;">
-            <h2 style="color: #ff4d4d; margin-bottom: 10px;">Missing System Component</h2>
-            <p style="font-size: 16px; line-height: 1.5;">The <b>ViGEm Bus Driver</b> is required but not installed on this PC.</p>
-            <p style="color: #aaa; font-size: 14px; margin-bottom: 30px;">This driver is needed to create virtual Xbox/DS4 controllers.</p>
-            
-            <a href="https://github.com/nefarius/ViGEmBus/releases/latest" 
-               style="background-color: #00f3ff; color: #000; padding: 12px 24px; text-decoration: none; border-radius: 6px; font-weight: bold; font-size: 14px; transition: opacity 0.2s;">
-               Download ViGEmBus Driver
-            </a>
-            
-            <div style="margin-top: 40px; border-top: 1px solid #333; padding-top: 20px; width: 100%;">
-                 <p style="font-family: monospace; color: #666; font-size: 11px;">Error Code: {str(e)}</p>
-            </div>
-        </body>
-        </html>
-        """
-        webview.create_window("Critical Error: Missing Driver", html=error_html, width=550, height=450, background_color='#121212')
-        webview.start()
-        sys.exit(1)
-    else:
-        raise e
+import receiver
+import qr_cache
+
+# --- ViGEmBus check ---
+# Loading vgamepad brings up the ViGEm client, which is slow; it runs once the
+# window is up (webview.start func) instead of before it can draw.
+def missing_driver_html(e):
+    return f"""
+    <!DOCTYPE html>
+    <html>
+    <body style="background-color: #121212; color: #e0e0e0; font-family: sans-serif; display: flex; flex-direction: column; align-items: center; justify-content: center; height: 100vh; padding: 20px; text-align: center;">
+        <h2 style="color: #ff4d4d; margin-bottom: 10px;">Missing System Component</h2>
+        <p style="font-size: 16px; line-height: 1.5;">The <b>ViGEm Bus Driver</b> is required but not installed on this PC.</p>
+        <p style="color: #aaa; font-size: 14px; margin-bottom: 30px;">This driver is needed to create virtual Xbox/DS4 controllers.</p>
+        
+        <a href="https://github.com/nefarius/ViGEmBus/releases/latest" 
+           style="background-color: #00f3ff; color: #000; padding: 12px 24px; text-decoration: none; border-radius: 6px; font-weight: bold; font-size: 14px; transition: opacity 0.2s;">
+           Download ViGEmBus Driver
+        </a>
+        
+        <div style="margin-top: 40px; border-top: 1px solid #333; padding-top: 20px; width: 100%;">
+             <p style="font-family: monospace; color: #666; font-size: 11px;">Error Code: {str(e)}</p>
+        </div>
+    </body>
+    </html>
+    """
+
+def check_driver(window):
+    try:
+        receiver.backends.load_vgamepad()
+    except Exception as e:
+        # Handle missing ViGEmBus Driver
+        if "VIGEM" in str(e) or "VBus" in str(e):
+            webview.create_window("Critical Error: Missing Driver", html=missing_driver_html(e), width=550, height=450, background_color='#121212')
+            window.destroy()
+        else:
+            print(f"Failed to load vgamepad: {e}")
 
 # Global State
 server_thread = None
@@ -177,6 +180,27 @@ HTML_TEMPLATE = """
                      <p id="haptic-status" class="text-[9px] font-mono text-gray-600">FORCE FEEDBACK MODULE OFFLINE</p>
                 </div>
 
+                <!-- Stick / Trigger Response -->
+                <div class="border-b border-white/10 pb-6">
+                    <h3 class="font-mono text-xs text-gray-500 uppercase mb-4">Stick Response</h3>
+                    <div class="grid grid-cols-2 gap-x-6 gap-y-3 font-mono text-[10px] text-gray-500">
+                        <label class="flex flex-col gap-1">DEADZONE <span id="val-deadzone" class="text-primary">0%</span>
+                            <input id="rs-deadzone" type="range" min="0" max="30" value="0" oninput="updateResponse()"></label>
+                        <label class="flex flex-col gap-1">ANTI-DEADZONE <span id="val-anti" class="text-primary">0%</span>
+                            <input id="rs-anti" type="range" min="0" max="30" value="0" oninput="updateResponse()"></label>
+                        <label class="flex flex-col gap-1">CURVE
+                            <select id="rs-curve" onchange="updateResponse()" class="bg-black border border-white/10 text-gray-300 p-1">
+                                <option value="linear">LINEAR</option><option value="expo">EXPO</option><option value="power">POWER</option>
+                            </select></label>
+                        <label class="flex flex-col gap-1">SHAPE
+                            <select id="rs-shape" onchange="updateResponse()" class="bg-black border border-white/10 text-gray-300 p-1">
+                                <option value="radial">RADIAL</option><option value="axial">AXIAL</option>
+                            </select></label>
+                        <label class="flex flex-col gap-1">TRIGGER DEADZONE <span id="val-trig" class="text-primary">0%</span>
+                            <input id="rs-trig" type="range" min="0" max="30" value="0" oninput="updateResponse()"></label>
+                    </div>
+                </div>
+
                 <!-- Key Map -->
                 <div>
                     <h3 class="font-mono text-xs text-gray-500 uppercase mb-4">Key Binding Override</h3>
@@ -254,7 +278,7 @@ HTML_TEMPLATE = """
                 <button onclick="setTheme('red')" class="w-3 h-3 rounded-full bg-[#ff003c] hover:scale-125 transition-transform"></button>
             </div>
             <div class="h-6 w-px bg-white/10"></div>
-             <div class="relative group">
+             <div class="relative group" onmouseenter="refreshIps()">
                 <div class="flex items-center gap-2 px-3 py-1.5 rounded bg-white/5 border border-white/5 text-[10px] uppercase font-mono cursor-pointer hover:bg-white/10 transition-colors">
                     <span class="material-icons text-xs text-gray-500">wifi</span>
                     <span id="current-ip-label" class="text-gray-300">AUTO-DETECT</span>
@@ -323,6 +347,10 @@ HTML_TEMPLATE = """
                         <h2 class="font-display text-sm text-primary uppercase tracking-widest neon-text">Telemetry Bridge</h2>
                         <span id="slot-badge" class="px-2 py-0.5 bg-primary/10 text-primary font-mono text-[10px] rounded border border-primary/30">0 / 4</span>
                     </div>
+                    <div id="slot-stepper" class="flex items-center gap-1 font-mono text-[10px]">
+                        <button onclick="changeCapacity(-1)" class="w-5 h-5 border border-white/10 text-gray-400 hover:text-primary hover:border-primary/50">-</button>
+                        <button onclick="changeCapacity(1)" class="w-5 h-5 border border-white/10 text-gray-400 hover:text-primary hover:border-primary/50">+</button>
+                    </div>
                 </div>
                 
                 <div id="player-list" class="grid grid-cols-1 gap-3 overflow-y-auto pr-2 flex-grow">
@@ -334,7 +362,10 @@ HTML_TEMPLATE = """
             <div id="perf-card" class="cyber-card p-3 rounded-sm opacity-80 h-36 flex flex-col overflow-hidden">
                  <div class="flex justify-between items-center mb-1 px-1 flex-none">
                       <span class="font-mono text-[9px] text-gray-500 uppercase">Input Stream (Ticks/Sec)</span>
-                      <span id="stat-pps" class="font-mono text-xs text-primary font-bold">0 PPS</span>
+                      <div class="flex gap-3">
+                          <span id="stat-lat" class="font-mono text-xs text-secondary font-bold" title="Worst player p95 receive -> driver update">-- MS P95</span>
+                          <span id="stat-pps" class="font-mono text-xs text-primary font-bold">0 PPS</span>
+                      </div>
                  </div>
                  <div class="flex-grow relative w-full h-full p-2">
                      <canvas id="perfChart"></canvas>
@@ -400,13 +431,27 @@ HTML_TEMPLATE = """
                 fill: true,
                 tension: 0.3,
                 pointRadius: 0
+            }, {
+                label: 'P95 MS',
+                data: Array(30).fill(0),
+                borderColor: '#ff00ff',
+                borderWidth: 1,
+                borderDash: [3, 3],
+                fill: false,
+                tension: 0.3,
+                pointRadius: 0,
+                yAxisID: 'lat'
             }]
         },
         options: {
             responsive: true,
             maintainAspectRatio: false,
             plugins: { legend: { display: false }, tooltip: { enabled: false } },
-            scales: { x: { display: false }, y: { display: false, min: 0, suggestedMax: 100, beginAtZero: true } },
+            scales: {
+                x: { display: false },
+                y: { display: false, min: 0, suggestedMax: 100, beginAtZero: true },
+                lat: { display: false, min: 0, suggestedMax: 5, beginAtZero: true, position: 'right' }
+            },
             animation: { duration: 0 }
         }
     });
@@ -418,6 +463,7 @@ HTML_TEMPLATE = """
     let editPlayerIdx = 0; // Currently editing player
     let pendingBind = null; // Key waiting to be bound
     let isRunningGlobal = false;
+    let latestP95 = 0; // ms, pushed once a second with PPS
 
     // --- NOTIFICATIONS ---
     function showNotification(title, msg) {
@@ -462,9 +508,21 @@ HTML_TEMPLATE = """
              }
         });
 
+        // Load response curve settings (the dialog edits both sticks together)
+        pywebview.api.get_response(idx).then(rs => {
+            const st = rs.left || {}, tr = rs.triggers || {};
+            document.getElementById('rs-deadzone').value = Math.round((st.deadzone || 0) * 100);
+            document.getElementById('rs-anti').value = Math.round((st.anti_deadzone || 0) * 100);
+            document.getElementById('rs-curve').value = st.curve || 'linear';
+            document.getElementById('rs-shape').value = st.shape || 'radial';
+            document.getElementById('rs-trig').value = Math.round((tr.deadzone || 0) * 100);
+            showResponseValues();
+        });
+
         // Load existing
         pywebview.api.get_mapping(idx).then(map => {
             for(const [btn, key] of Object.entries(map)) {
+                if(typeof key !== 'string') continue; // axis remaps aren't shown here
                 if(document.getElementById('lbl-'+btn)) document.getElementById('lbl-'+btn).innerText = key.toUpperCase();
                 if(document.getElementById('btn-'+btn)) document.getElementById('btn-'+btn).classList.add('bound');
             }
@@ -502,6 +560,29 @@ HTML_TEMPLATE = """
         }
     }
 
+    function showResponseValues() {
+        document.getElementById('val-deadzone').innerText = document.getElementById('rs-deadzone').value + '%';
+        document.getElementById('val-anti').innerText = document.getElementById('rs-anti').value + '%';
+        document.getElementById('val-trig').innerText = document.getElementById('rs-trig').value + '%';
+    }
+
+    let responseTimer = null;
+    function updateResponse() {
+        showResponseValues();
+        // Tables are rebuilt server side on every change; only send once the slider settles
+        clearTimeout(responseTimer);
+        responseTimer = setTimeout(() => {
+            const stick = {
+                deadzone: document.getElementById('rs-deadzone').value / 100,
+                anti_deadzone: document.getElementById('rs-anti').value / 100,
+                curve: document.getElementById('rs-curve').value,
+                shape: document.getElementById('rs-shape').value
+            };
+            const triggers = { deadzone: document.getElementById('rs-trig').value / 100 };
+            pywebview.api.set_response(editPlayerIdx, { left: stick, right: stick, triggers: triggers });
+        }, 150);
+    }
+
     function bindKey(btn) {
         pendingBind = btn;
         document.getElementById('bind-status').innerText = `PRESS KEY FOR '${btn.toUpperCase()}'...`;
@@ -541,6 +622,7 @@ HTML_TEMPLATE = """
         else if(colorName === 'red') pColor = '#ff003c';
         
         r.style.setProperty('--color-primary', pColor);
+        pywebview.api.set_qr_color(pColor);
         perfChart.data.datasets[0].borderColor = pColor;
         perfChart.data.datasets[0].backgroundColor = pColor + '20';
         perfChart.update();
@@ -582,16 +664,57 @@ HTML_TEMPLATE = """
         pywebview.api.stop_server(); 
     }
 
+    // Full snapshot (first load) -> same renderers the pushed deltas use
     function updateState(state) {
-        const { running, ip, players, qr, ips, pps } = state;
+        ensureSlots(state.slots);
+        renderServer(state);
+        renderPlayers(state.players);
+        renderTick(state.pps, latestP95);
+    }
+
+    // Pushed from Python (StatePusher) with only what changed since the last push
+    function applyDelta(d) {
+        if(d.server) { ensureSlots(d.server.slots); renderServer(d.server); }
+        if(d.players) {
+            for(const [idx, p] of Object.entries(d.players)) renderPlayer(parseInt(idx), p);
+            updateBadge();
+        }
+        if(d.pps !== undefined) {
+            if(d.p95 !== undefined) latestP95 = d.p95;
+            renderTick(d.pps, latestP95);
+        }
+    }
+
+    function renderIps(ips) {
+        if(ips.join() === availableIps.join() || ips.length === 0) return;
+        availableIps = ips;
+        const drop = document.getElementById('ip-dropdown');
+        drop.innerHTML = '<div onclick="selectIp(\\'AUTO\\')" class="px-3 py-2 hover:bg-white/5 cursor-pointer text-xs font-mono text-gray-400">AUTO DETECT</div>';
+        ips.forEach(addr => drop.innerHTML += `<div onclick="selectIp('${addr}')" class="px-3 py-2 hover:bg-white/5 cursor-pointer text-xs font-mono text-gray-300">${addr}</div>`);
+    }
+
+    // Re-scan when the picker is opened so a network switch shows up without a restart
+    function refreshIps() { pywebview.api.refresh_network().then(renderIps); }
+
+    // QR arrives as a cache key; the SVG itself is fetched once per key
+    let shownQr = null;
+    function showQr(key) {
+        shownQr = key;
+        pywebview.api.get_qr(key).then(svg => {
+            if(!svg || key !== shownQr) return;
+            document.getElementById('qr-img').src = "data:image/svg+xml;charset=utf-8," + encodeURIComponent(svg);
+            document.getElementById('qr-img').classList.remove('scale-90', 'opacity-0');
+            document.getElementById('qr-scan-line').style.opacity = '1'; document.getElementById('qr-scan-line').style.animation = 'scan 2s linear infinite';
+        });
+    }
+
+    function renderServer(state) {
+        const { running, ip, qr, ips } = state;
         isRunningGlobal = running;
+        // Slot count is fixed while serving
+        document.getElementById('slot-stepper').classList.toggle('hidden', running);
         
-        if(availableIps.length !== ips.length && ips.length > 0) {
-            availableIps = ips;
-            const drop = document.getElementById('ip-dropdown');
-            drop.innerHTML = '<div onclick="selectIp(\\'AUTO\\')" class="px-3 py-2 hover:bg-white/5 cursor-pointer text-xs font-mono text-gray-400">AUTO DETECT</div>';
-            ips.forEach(addr => drop.innerHTML += `<div onclick="selectIp('${addr}')" class="px-3 py-2 hover:bg-white/5 cursor-pointer text-xs font-mono text-gray-300">${addr}</div>`);
-        }
+        renderIps(ips);
         
         const statusText = document.getElementById('status-text');
         const gauge = document.getElementById('gauge-circle');
@@ -612,12 +735,7 @@ HTML_TEMPLATE = """
             
             document.getElementById('display-ip').textContent = ip || "INITIALIZING..."; document.getElementById('display-ip').classList.remove('opacity-50');
             
-            if(qr && document.getElementById('qr-img').src.indexOf('base64') === -1) {
-                document.getElementById('qr-img').src = "data:image/png;base64," + qr;
-                document.getElementById('qr-img').classList.remove('scale-90', 'opacity-0');
-                document.getElementById('qr-scan-line').style.opacity = '1'; document.getElementById('qr-scan-line').style.animation = 'scan 2s linear infinite';
-            }
-            document.getElementById('stat-pps').innerText = pps + " PPS"; perfChart.data.datasets[0].data.push(pps); perfChart.data.datasets[0].data.shift(); perfChart.update();
+            if(qr && qr !== shownQr) showQr(qr);
         } else {
             statusText.textContent = "OFF"; statusText.className = "block font-display font-black text-3xl text-gray-600"; gauge.style.strokeDashoffset = '440';
             ['power-card','qr-card','lobby-card','perf-card'].forEach(id=>document.getElementById(id).classList.remove('active','opacity-100'));
@@ -632,96 +750,120 @@ HTML_TEMPLATE = """
 
             document.getElementById('display-ip').textContent = "--.--.--.--";
             document.getElementById('stat-pps').innerText = "0 PPS";
+            document.getElementById('stat-lat').innerText = "-- MS P95";
         }
-        
-        // Player List Optimization
+    }
+
+    function renderTick(pps, p95) {
+        if(!isRunningGlobal) return;
+        document.getElementById('stat-pps').innerText = pps + " PPS"; perfChart.data.datasets[0].data.push(pps); perfChart.data.datasets[0].data.shift();
+        document.getElementById('stat-lat').innerText = p95 ? p95.toFixed(2) + " MS P95" : "-- MS P95";
+        perfChart.data.datasets[1].data.push(p95); perfChart.data.datasets[1].data.shift(); perfChart.update();
+    }
+
+    // Player List Optimization: slots are created once, then patched per player
+    function unitLabel(idx) { return `UNIT ${String(idx+1).padStart(2, '0')}`; }
+
+    function ensureSlots(count) {
         const list = document.getElementById('player-list');
-        
-        // Ensure slots exist (Create once)
-        if(list.children.length !== players.length) {
-            list.innerHTML = '';
-            players.forEach((_, idx) => {
-                const div = document.createElement('div');
-                div.id = `p-card-${idx}`;
-                // Default Inactive State
-                div.className = "p-3 border border-white/5 bg-white/5 opacity-50 rounded-sm flex items-center gap-4 group transition-all duration-300";
-                div.innerHTML = `
-                <div class="w-12 h-12 relative flex items-center justify-center rounded-sm bg-black border border-white/10 overflow-hidden">
-                    <div id="p-stick-${idx}" class="absolute w-2 h-2 bg-primary rounded-full shadow-[0_0_5px_var(--color-primary)] input-bar hidden"></div>
-                    <span id="p-icon-${idx}" class="material-icons text-gray-700">gamepad</span>
+        if(!count || list.children.length === count) return;
+        list.innerHTML = '';
+        connectedPlayers.clear();
+        for(let idx = 0; idx < count; idx++) {
+            const div = document.createElement('div');
+            div.id = `p-card-${idx}`;
+            // Default Inactive State
+            div.className = "p-3 border border-white/5 bg-white/5 opacity-50 rounded-sm flex items-center gap-4 group transition-all duration-300";
+            div.innerHTML = `
+            <div class="w-12 h-12 relative flex items-center justify-center rounded-sm bg-black border border-white/10 overflow-hidden">
+                <div id="p-stick-${idx}" class="absolute w-2 h-2 bg-primary rounded-full shadow-[0_0_5px_var(--color-primary)] input-bar hidden"></div>
+                <span id="p-icon-${idx}" class="material-icons text-gray-700">gamepad</span>
+            </div>
+            <div class="flex-grow">
+                <div class="flex justify-between items-center mb-1">
+                    <span id="p-label-${idx}" class="font-display text-xs font-bold tracking-wider text-gray-600">${unitLabel(idx)}</span>
+                    <div id="p-action-${idx}"></div>
                 </div>
-                <div class="flex-grow">
-                    <div class="flex justify-between items-center mb-1">
-                        <span id="p-label-${idx}" class="font-display text-xs font-bold tracking-wider text-gray-600">UNIT 0${idx+1}</span>
-                        <div id="p-action-${idx}"></div>
-                    </div>
-                    <div class="h-1 w-full bg-black rounded-full overflow-hidden">
-                        <div id="p-bar-${idx}" class="h-full bg-primary transition-all duration-300" style="width: 0%"></div>
-                    </div>
-                </div>`;
-                list.appendChild(div);
-            });
+                <div class="h-1 w-full bg-black rounded-full overflow-hidden">
+                    <div id="p-bar-${idx}" class="h-full bg-primary transition-all duration-300" style="width: 0%"></div>
+                </div>
+            </div>`;
+            list.appendChild(div);
         }
+    }
 
-        let pCount = 0;
-        let currentIds = new Set();
-
-        players.forEach((p, idx) => {
-             const card = document.getElementById(`p-card-${idx}`);
-             const stick = document.getElementById(`p-stick-${idx}`);
-             const icon = document.getElementById(`p-icon-${idx}`);
-             const label = document.getElementById(`p-label-${idx}`);
-             const action = document.getElementById(`p-action-${idx}`);
-             const bar = document.getElementById(`p-bar-${idx}`);
-             
-             if(p.connected) {
-                 pCount++; currentIds.add(idx);
-                 if(!connectedPlayers.has(idx)) showNotification("NEW LINK DETECTED", `Unit 0${idx+1} Connected`);
-                 
-                 // Active State Styles
-                 // Use classList for performance/cleanliness logic or full string to ensure match
-                 card.className = "p-3 border border-primary/50 bg-primary/5 neon-border rounded-sm flex items-center gap-4 group transition-all duration-300";
-                 
-                 // Visuals
-                 const vis = p.visuals || {lx:0, ly:0};
-                 const lx_pct = 50 + (vis.lx * 40); 
-                 const ly_pct = 50 + (vis.ly * 40);
-                 
-                 stick.style.left = `${lx_pct}%`;
-                 stick.style.top = `${ly_pct}%`;
-                 stick.classList.remove('hidden');
-                 icon.classList.add('hidden');
-                 
-                 label.innerHTML = `UNIT 0${idx+1} <span class="font-mono text-[9px] text-gray-500 opacity-70 ml-2">${p.pps||0} PPS</span>`;
-                 label.className = "font-display text-xs font-bold tracking-wider text-primary neon-text";
-                 
-                 if(action.getAttribute('data-state') !== 'config') {
-                     action.innerHTML = `<button onclick="openSettings(${idx})" class="text-[9px] px-2 py-0.5 border border-primary text-primary hover:bg-primary hover:text-black uppercase">Config</button>`;
-                     action.setAttribute('data-state', 'config');
-                 }
-                 
-                 bar.style.width = "100%";
-                 
-             } else {
-                 // Inactive State
-                 card.className = "p-3 border border-white/5 bg-white/5 opacity-50 rounded-sm flex items-center gap-4 group transition-all duration-300";
-                 stick.classList.add('hidden');
-                 icon.classList.remove('hidden');
-                 label.className = "font-display text-xs font-bold tracking-wider text-gray-600";
-                 
-                 if(action.getAttribute('data-state') !== 'offline') {
-                     action.innerHTML = `<span class="font-mono text-[9px] text-gray-700">OFFLINE</span>`;
-                     action.setAttribute('data-state', 'offline');
-                 }
-                 bar.style.width = "0%";
-             }
-        });
+    function renderPlayers(players) {
+        ensureSlots(players.length);
+        players.forEach((p, idx) => renderPlayer(idx, p));
+        updateBadge();
+    }
+
+    function renderPlayer(idx, p) {
+        const card = document.getElementById(`p-card-${idx}`);
+        if(!card) return;
+        const stick = document.getElementById(`p-stick-${idx}`);
+        const icon = document.getElementById(`p-icon-${idx}`);
+        const label = document.getElementById(`p-label-${idx}`);
+        const action = document.getElementById(`p-action-${idx}`);
+        const bar = document.getElementById(`p-bar-${idx}`);
         
-        document.getElementById('slot-badge').textContent = `${pCount} / 4`;
-        connectedPlayers = currentIds;
+        if(p.connected) {
+            if(!connectedPlayers.has(idx)) {
+                showNotification("NEW LINK DETECTED", `${unitLabel(idx)} Connected`);
+                connectedPlayers.add(idx);
+            }
+            
+            // Active State Styles
+            card.className = "p-3 border border-primary/50 bg-primary/5 neon-border rounded-sm flex items-center gap-4 group transition-all duration-300";
+            
+            // Visuals
+            const vis = p.visuals || {lx:0, ly:0};
+            stick.style.left = `${50 + (vis.lx * 40)}%`;
+            stick.style.top = `${50 + (vis.ly * 40)}%`;
+            stick.classList.remove('hidden');
+            icon.classList.add('hidden');
+            
+            label.innerHTML = `${unitLabel(idx)} <span class="font-mono text-[9px] text-gray-500 opacity-70 ml-2">${(p.kind||'').toUpperCase()} ${p.pps||0} PPS</span>`;
+            label.className = "font-display text-xs font-bold tracking-wider text-primary neon-text";
+            
+            if(action.getAttribute('data-state') !== 'config') {
+                action.innerHTML = `<button onclick="openSettings(${idx})" class="text-[9px] px-2 py-0.5 border border-primary text-primary hover:bg-primary hover:text-black uppercase">Config</button>`;
+                action.setAttribute('data-state', 'config');
+            }
+            
+            bar.style.width = "100%";
+            
+        } else {
+            connectedPlayers.delete(idx);
+            // Inactive State
+            card.className = "p-3 border border-white/5 bg-white/5 opacity-50 rounded-sm flex items-center gap-4 group transition-all duration-300";
+            stick.classList.add('hidden');
+            icon.classList.remove('hidden');
+            label.innerHTML = unitLabel(idx);
+            label.className = "font-display text-xs font-bold tracking-wider text-gray-600";
+            
+            if(action.getAttribute('data-state') !== 'offline') {
+                action.innerHTML = `<span class="font-mono text-[9px] text-gray-700">OFFLINE</span>`;
+                action.setAttribute('data-state', 'offline');
+            }
+            bar.style.width = "0%";
+        }
+    }
+
+    function updateBadge() {
+        const total = document.getElementById('player-list').children.length;
+        document.getElementById('slot-badge').textContent = `${connectedPlayers.size} / ${total}`;
+    }
+
+    function changeCapacity(step) {
+        if(isRunningGlobal) return;
+        const total = document.getElementById('player-list').children.length;
+        pywebview.api.set_capacity(total + step);
+        playBeep(400, 'sine', 0.05);
     }
     
-    setInterval(() => { pywebview.api.get_state().then(updateState); }, 250); 
+    // Initial snapshot; everything after that is pushed via applyDelta
+    window.addEventListener('pywebviewready', () => { pywebview.api.get_state().then(updateState); });
     function receiveLog(msg) { const c=document.getElementById('console-out'); const d=document.createElement('div'); d.innerHTML = `<span class="opacity-30 mr-2">></span> ${msg}`; d.className="text-primary/70"; c.appendChild(d); c.scrollTop=c.scrollHeight; }
     setTimeout(() => playBeep(200, 'sine', 0.05), 500);
 </script>
@@ -731,25 +873,49 @@ HTML_TEMPLATE = """
 
 class Api:
     def __init__(self):
-        self.cached_qr = None
+        self.qr = qr_cache.QrCache()
+        self.qr_ip = None
+        self.qr_color = "#00f3ff" # follows the dashboard theme
+        self.qr_key = None
         self.last_check = time.time()
-        self.last_packets = 0
         self.last_player_packets = {}
         self.player_pps = {}
-        self.ips = []
-        try: self.ips = socket.gethostbyname_ex(socket.gethostname())[2]
-        except: self.ips = [receiver.get_local_ip()]
         self.settings = {"haptics": True}
+        self.settings_errors = {} # setting -> why it was not applied, see load_settings
         self.load_settings()
 
     def load_settings(self):
         try:
             if os.path.exists(SETTINGS_FILE):
                 with open(SETTINGS_FILE, 'r') as f:
-                    self.settings = json.load(f)
-            # Apply initial state globally if needed
-            receiver.HAPTICS_ENABLED = self.settings.get("haptics", True)
-        except: pass
+                    settings = json.load(f)
+                if not isinstance(settings, dict): raise ValueError("not a JSON object")
+                self.settings = settings
+        except Exception as e: self._setting_failed("settings.json", e)
+        # Apply initial state globally; each setting on its own so one bad value
+        # doesn't silently skip the rest
+        s = self.settings
+        steps = [
+            ("haptics", lambda: setattr(receiver, 'HAPTICS_ENABLED', s.get("haptics", True))),
+            ("players", lambda: receiver.set_capacity(s.get("players", receiver.MAX_PLAYERS))),
+            ("prewarm", lambda: receiver.PREWARM.update(s.get("prewarm", {}))), # e.g. {"x360": 2}
+        ]
+        try: responses = list(s.get("response", {}).items())
+        except Exception as e: self._setting_failed("response", e); responses = []
+        steps += [(f"response.{idx}", lambda idx=idx, rs=rs: receiver.set_response(int(idx), rs)) for idx, rs in responses]
+        steps.append(("mouse", lambda: receiver.configure_mouse(**s.get("mouse", {}))))
+        if s.get("metrics_port"): steps.append(("metrics_port", lambda: receiver.metrics.serve(s["metrics_port"]))) # e.g. 9109
+        for name, apply in steps:
+            try: apply()
+            except Exception as e: self._setting_failed(name, e)
+
+    def _setting_failed(self, name, error):
+        self.settings_errors[name] = str(error)
+        print(f"Setting '{name}' not applied: {error}")
+
+    def get_settings_errors(self):
+        # Settings from settings.json that failed to apply at startup (name -> error)
+        return self.settings_errors
 
     def save_settings(self):
         try:
@@ -765,16 +931,11 @@ class Api:
         receiver.HAPTICS_ENABLED = enabled
         self.save_settings()
 
-    def get_state(self):
-        global receiver
+    def sample_pps(self):
+        # Recomputed at most once a second; in between the last figures are returned
         now = time.time()
         dt = now - self.last_check
-        pps = 0
         if dt >= 1.0:
-            current = receiver.packet_counter
-            pps = int((current - self.last_packets) / dt)
-            self.last_packets = current
-            
             # Calculate Per-Player PPS
             for i, p in enumerate(receiver.players):
                 cur_p = getattr(p, 'packet_count', 0)
@@ -784,36 +945,112 @@ class Api:
                 self.last_player_packets[i] = cur_p
             
             self.last_check = now
-            receiver.current_pps = pps 
-        else: pps = receiver.current_pps
-
-        player_list = []
-        for i, p in enumerate(receiver.players):
-            player_list.append({
-                "connected": p.connected,
-                "addr": p.addr[0] if p.addr else "",
-                "visuals": getattr(p, 'visuals', {}),
-                "pps": self.player_pps.get(i, 0)
-            })
-            
+        return receiver.get_pps()
+
+    def server_state(self):
         return {
             "running": receiver.running,
             "ip": receiver.get_local_ip() if receiver.running else None,
-            "players": player_list,
-            "qr": self.cached_qr if receiver.running else None,
-            "ips": self.ips,
-            "pps": pps
+            "qr": self.qr_key if receiver.running else None,
+            "ips": receiver.netinfo.local_ips(),
+            "slots": len(receiver.players)
+        }
+
+    def player_state(self, i):
+        # One read per attribute: a disconnect can clear them between two reads
+        p = receiver.players[i]
+        addr, reader, gp = p.addr, p.reader, p.gamepad
+        return {
+            "connected": p.connected,
+            "addr": addr[0] if addr else "",
+            "visuals": getattr(p, 'visuals', {}),
+            "pps": self.player_pps.get(i, 0),
+            "frames": p.packet_count,
+            "updates": p.driver_updates,
+            "skipped": reader.data_skipped if reader else 0,
+            "kind": gp.kind if gp else None
+        }
+
+    def start_recording(self, path=None):
+        # Input recording for bench/replay.py; default file is next to settings.json
+        path = path or time.strftime("session-%Y%m%d-%H%M%S.nxrec")
+        try: return receiver.start_recording(path)
+        except Exception as e: return {"error": str(e)}
+
+    def stop_recording(self):
+        return receiver.stop_recording()
+
+    def get_qr(self, key):
+        # SVG for a key from server_state; waits briefly if the worker is still on it
+        return self.qr.get(key)
+
+    def set_qr_color(self, color):
+        self.qr_color = color
+        if receiver.running and self.qr_ip:
+            self.qr_key = self.qr.request(self.qr_ip, receiver.TCP_PORT, color)
+            receiver.publish('server')
+
+    def get_metrics(self):
+        # Same registry the scrape endpoint serves; works without the window open
+        return receiver.metrics.collect()
+
+    def text_stats(self):
+        return receiver.get_text_stats()
+
+    def get_response(self, p_idx):
+        return self.settings.get("response", {}).get(str(p_idx), {})
+
+    def set_response(self, p_idx, settings):
+        # Deadzone/curve settings per player; tables are rebuilt now, not per frame
+        receiver.set_response(p_idx, settings)
+        self.settings.setdefault("response", {})[str(p_idx)] = settings
+        self.save_settings()
+
+    def get_mouse_settings(self):
+        return receiver.configure_mouse()
+
+    def set_mouse_settings(self, settings):
+        # Gyro/trackpad mouse: sensitivity, deadzone, accel, rate, smoothing, trackpad_scale
+        self.settings.setdefault("mouse", {}).update(settings)
+        self.save_settings()
+        return receiver.configure_mouse(**settings)
+
+    def set_capacity(self, n):
+        # Number of player slots; the change reaches the page as a 'server' delta
+        if receiver.running: return receiver.MAX_PLAYERS
+        self.settings["players"] = receiver.set_capacity(n)
+        self.save_settings()
+        return self.settings["players"]
+
+    def refresh_network(self):
+        # Explicit re-scan, e.g. after switching Wi-Fi with the window open
+        return receiver.netinfo.refresh()
+
+    def get_state(self):
+        # Full snapshot for the initial page load; StatePusher sends deltas after that
+        state = self.server_state()
+        state["pps"] = self.sample_pps()
+        state["players"] = [self.player_state(i) for i in range(len(receiver.players))]
+        return state
+
+    def get_latency(self):
+        # Per-player p50/p95/p99 (ms) per stage, plus the worst total p95 for the chart
+        players = receiver.get_player_latency()
+        totals = [p['total']['p95'] for p in players if p]
+        return {
+            "players": players,
+            "p95": max(totals) if totals else 0,
+            "active": len(totals)
         }
 
     def start_server(self, manual_ip=None):
         global server_thread
         if not receiver.running:
+            receiver.netinfo.refresh() # the QR must carry today's address, not a cached one
             ip = manual_ip if (manual_ip and manual_ip != 'AUTO') else receiver.get_local_ip()
-            qr = qrcode.QRCode(box_size=10, border=1)
-            qr.add_data(ip); qr.make(fit=True)
-            img = qr.make_image(fill_color="#00f3ff", back_color="transparent")
-            buffered = BytesIO(); img.save(buffered, format="PNG")
-            self.cached_qr = base64.b64encode(buffered.getvalue()).decode("utf-8")
+            # Built on the QR worker (or read from its cache); the page fetches it by key
+            self.qr_ip = ip
+            self.qr_key = self.qr.request(ip, receiver.TCP_PORT, self.qr_color)
             server_thread = threading.Thread(target=self._run, daemon=True)
             server_thread.start()
 
@@ -834,17 +1071,75 @@ class Api:
 
     def set_key_bind(self, p_idx, btn, key):
         if p_idx < len(receiver.players):
-            p = receiver.players[p_idx]
-            if not hasattr(p, 'key_map'): p.key_map = {}
-            p.key_map[btn] = key
+            receiver.bind_key(p_idx, btn, key)
             print(f"Mapped P{p_idx+1} [{btn}] -> {key}")
 
     def test_rumble(self, p_idx, strength):
         receiver.trigger_rumble(p_idx, strength, strength)
 
+class StatePusher:
+    # Forwards receiver state changes to the page as applyDelta() calls. Events only
+    # mark things dirty; this thread batches them to at most one push per display
+    # frame, and while the server is stopped it sleeps until something happens.
+    FRAME_INTERVAL = 1 / 60
+    TICK_INTERVAL = 1.0 # PPS / latency chart
+
+    def __init__(self, api, window):
+        self.api = api
+        self.window = window
+        self.lock = threading.Lock()
+        self.wake = threading.Event()
+        self.server_dirty = True
+        self.dirty = set()
+        receiver.subscribe(self.on_event)
+
+    def on_event(self, event, idx):
+        with self.lock:
+            if event == 'server': self.server_dirty = True
+            else: self.dirty.add(idx)
+        self.wake.set()
+
+    def run(self):
+        next_tick = 0
+        while True:
+            if receiver.running: self.wake.wait(max(0, next_tick - time.time()))
+            else: self.wake.wait()
+            self.wake.clear()
+            with self.lock:
+                server_dirty, dirty = self.server_dirty, self.dirty
+                self.server_dirty, self.dirty = False, set()
+
+            try:
+                delta = {}
+                if server_dirty:
+                    delta['server'] = self.api.server_state()
+                    dirty = range(len(receiver.players))
+                now = time.time()
+                if receiver.running and now >= next_tick:
+                    delta['pps'] = self.api.sample_pps()
+                    delta['p95'] = self.api.get_latency()['p95']
+                    # Per-player PPS labels only change on the tick
+                    dirty = set(dirty) | {i for i, p in enumerate(receiver.players) if p.connected}
+                    next_tick = now + self.TICK_INTERVAL
+                if dirty:
+                    delta['players'] = {i: self.api.player_state(i) for i in dirty}
+
+                if delta:
+                    try: self.window.evaluate_js(f"applyDelta({json.dumps(delta)})")
+                    except: pass
+            except Exception as e:
+                # A player changing state mid-read must not end the pushes; resend next frame
+                print(f"State push error: {e}")
+                with self.lock:
+                    if server_dirty: self.server_dirty = True
+                    else: self.dirty.update(dirty)
+            time.sleep(self.FRAME_INTERVAL)
+
 if __name__ == '__main__':
     api = Api()
     window = webview.create_window('Nexus Core', html=HTML_TEMPLATE, js_api=api, width=1000, height=760, background_color='#020202', resizable=True)
-    webview.start(debug=False)
+    pusher = StatePusher(api, window)
+    threading.Thread(target=pusher.run, daemon=True).start()
+    webview.start(check_driver, window, debug=False)
     receiver.stop_server()
-    
\ No newline at end of file
+    receiver.stop_recording()
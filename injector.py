@@ -0,0 +1,193 @@
+# --- Text injection ---
+# TEXT (0x02) strings are handed to one worker thread and typed there, so a long
+# paste never holds up the reader that is also applying that phone's DATA frames.
+# On Windows a whole string goes out as a single SendInput call of
+# KEYEVENTF_UNICODE events (layout independent, no per-character round trips);
+# elsewhere, or if SendInput fails, pynput's keyboard.type() types what is left.
+import os
+import threading
+import time
+from collections import deque
+
+MAX_PENDING = 64 * 1024 # queued characters before new strings are dropped
+MAX_BATCH = 4096 # characters per SendInput call; longer strings are split
+
+# --- Win32 SendInput ---
+INPUT_KEYBOARD = 1
+KEYEVENTF_KEYUP = 0x0002
+KEYEVENTF_UNICODE = 0x0004
+VK_BACK = 0x08
+VK_RETURN = 0x0D
+SPECIAL_VK = {'\b': VK_BACK, '\n': VK_RETURN}
+
+if os.name == 'nt':
+    import ctypes
+    from ctypes import wintypes
+
+    class KEYBDINPUT(ctypes.Structure):
+        _fields_ = [('wVk', wintypes.WORD), ('wScan', wintypes.WORD), ('dwFlags', wintypes.DWORD),
+                    ('time', wintypes.DWORD), ('dwExtraInfo', ctypes.c_size_t)]
+
+    class MOUSEINPUT(ctypes.Structure):
+        # Only here so the union has the size SendInput expects
+        _fields_ = [('dx', wintypes.LONG), ('dy', wintypes.LONG), ('mouseData', wintypes.DWORD),
+                    ('dwFlags', wintypes.DWORD), ('time', wintypes.DWORD), ('dwExtraInfo', ctypes.c_size_t)]
+
+    class _INPUTUNION(ctypes.Union):
+        _fields_ = [('ki', KEYBDINPUT), ('mi', MOUSEINPUT)]
+
+    class INPUT(ctypes.Structure):
+        _fields_ = [('type', wintypes.DWORD), ('u', _INPUTUNION)]
+
+    try:
+        _SendInput = ctypes.windll.user32.SendInput
+        _SendInput.argtypes = (wintypes.UINT, ctypes.POINTER(INPUT), ctypes.c_int)
+        _SendInput.restype = wintypes.UINT
+    except: _SendInput = None
+else:
+    _SendInput = None
+HAS_SENDINPUT = _SendInput is not None # can type without pynput
+
+
+def build_events(text):
+    # -> [(vk, scan, flags)] for a down/up pair per UTF-16 unit (surrogate pairs stay pairs)
+    events = []
+    data = text.encode('utf-16-le')
+    for i in range(0, len(data), 2):
+        unit = data[i] | data[i + 1] << 8
+        vk = SPECIAL_VK.get(chr(unit))
+        if vk:
+            events.append((vk, 0, 0))
+            events.append((vk, 0, KEYEVENTF_KEYUP))
+        else:
+            events.append((0, unit, KEYEVENTF_UNICODE))
+            events.append((0, unit, KEYEVENTF_UNICODE | KEYEVENTF_KEYUP))
+    return events
+
+
+def chars_sent(text, events):
+    # -> how many leading characters of text the first `events` events typed; a
+    # character counts once its last key-down is out (the key-up alone types nothing)
+    done = 0
+    for n, c in enumerate(text):
+        done += 4 if ord(c) > 0xFFFF else 2 # down/up per UTF-16 unit
+        if events < done - 1: return n
+    return len(text)
+
+
+def send_unicode(text):
+    # One SendInput call for the whole string; -> number of events injected
+    events = build_events(text)
+    arr = (INPUT * len(events))()
+    for n, (vk, scan, flags) in enumerate(events):
+        arr[n].type = INPUT_KEYBOARD
+        arr[n].u.ki.wVk = vk
+        arr[n].u.ki.wScan = scan
+        arr[n].u.ki.dwFlags = flags
+    return _SendInput(len(events), arr, ctypes.sizeof(INPUT))
+
+
+class TextInjector:
+    def __init__(self, keyboard=None, key=None, name="text-injector"):
+        # keyboard/key: pynput Controller and Key, used when SendInput isn't available
+        self.keyboard = keyboard
+        self.specials = {'\b': key.backspace, '\n': key.enter} if key else {}
+        self.use_sendinput = _SendInput is not None
+        self.cond = threading.Condition()
+        self.queue = deque()
+        self.pending_chars = 0
+        self.closed = False
+
+        self.batches = 0 # OS injection calls (SendInput or one keyboard.type run)
+        self.injected = 0 # characters typed
+        self.dropped = 0 # strings refused because the queue was full
+        self.max_depth = 0
+        self.last_ms = 0.0
+
+        self.thread = threading.Thread(target=self._run, name=name, daemon=True)
+        self.thread.start()
+
+    def submit(self, text):
+        # Never blocks the caller
+        if not text: return True
+        with self.cond:
+            if self.closed or self.pending_chars + len(text) > MAX_PENDING:
+                self.dropped += 1
+                return False
+            self.queue.append(text)
+            self.pending_chars += len(text)
+            if len(self.queue) > self.max_depth: self.max_depth = len(self.queue)
+            self.cond.notify()
+        return True
+
+    def close(self):
+        with self.cond:
+            self.closed = True
+            self.queue.clear()
+            self.pending_chars = 0
+            self.cond.notify()
+
+    def _next(self):
+        # Everything queued since the last batch is typed as one string
+        with self.cond:
+            while not self.queue and not self.closed: self.cond.wait()
+            if self.closed: return None
+            text = ''.join(self.queue)
+            self.queue.clear()
+            self.pending_chars = 0
+            return text
+
+    def _run(self):
+        while True:
+            text = self._next()
+            if text is None: return
+            t0 = time.perf_counter()
+            for i in range(0, len(text), MAX_BATCH):
+                self._inject(text[i:i + MAX_BATCH])
+            self.last_ms = (time.perf_counter() - t0) * 1000
+
+    def _inject(self, text):
+        if self.use_sendinput:
+            sent = 0
+            try:
+                sent = send_unicode(text)
+                if sent == len(text.encode('utf-16-le')): # 2 events per 2-byte unit
+                    self.batches += 1
+                    self.injected += len(text)
+                    return
+            except: pass
+            # Blocked (UIPI, secure desktop) or broken: don't keep trying per string,
+            # and only type the characters SendInput didn't get to
+            self.use_sendinput = False
+            done = chars_sent(text, sent)
+            self.injected += done
+            text = text[done:]
+            if not text: return
+        if not self.keyboard: return
+        # pynput types one character at a time anyway; split only on the keys it can't type
+        run = []
+        try:
+            for c in text:
+                special = self.specials.get(c)
+                if special is None:
+                    run.append(c)
+                    continue
+                if run: self.keyboard.type(''.join(run)); run = []
+                self.keyboard.press(special)
+                self.keyboard.release(special)
+            if run: self.keyboard.type(''.join(run))
+            self.batches += 1
+            self.injected += len(text)
+        except: pass
+
+    def stats(self):
+        return {
+            'depth': len(self.queue),
+            'pending_chars': self.pending_chars,
+            'max_depth': self.max_depth,
+            'batches': self.batches,
+            'injected': self.injected,
+            'dropped': self.dropped,
+            'last_ms': round(self.last_ms, 2),
+            'backend': 'sendinput' if self.use_sendinput else 'pynput'
+        }
@@ -0,0 +1,277 @@
+# --- Metrics registry ---
+# Counters and histograms are sharded per thread: every reader thread, the event
+# loop, the UDP thread and each outbox writer update only their own shard, so
+# the hot path takes no lock and no increment is lost between threads. Readers
+# (the dashboard Api, the scrape endpoint) sum the shards; shards of threads that
+# have exited are folded into a retired total and dropped.
+#
+#   FRAMES = metrics.counter('nexus_frames_total', 'Frames received', label='op')
+#   FRAMES.inc('data')
+#   metrics.collect()            -> plain dict, JSON friendly
+#   metrics.render()             -> Prometheus text format
+#   metrics.serve(port)          -> local scrape endpoint (/metrics, /metrics.json)
+import bisect
+import json
+import threading
+import time
+
+_registry = {}
+_registry_lock = threading.Lock()
+
+
+class _Sharded:
+    # Per-thread shards plus the folded totals of threads that are gone
+    def __init__(self, name, help, label=None):
+        self.name = name
+        self.help = help
+        self.label = label
+        self._local = threading.local()
+        self._lock = threading.Lock() # shard list only, never the hot path
+        self._shards = [] # (thread, shard)
+        self._retired = self._new_shard()
+
+    def _shard(self):
+        try: return self._local.shard
+        except AttributeError: pass
+        shard = self._local.shard = self._new_shard()
+        with self._lock: self._shards.append((threading.current_thread(), shard))
+        return shard
+
+    def _snapshot(self):
+        # -> copies of every shard; dead threads' shards are folded into _retired
+        with self._lock:
+            live = []
+            for t, shard in self._shards:
+                if t.is_alive(): live.append((t, shard))
+                else: self._merge(self._retired, self._copy(shard))
+            self._shards = live
+            return [self._copy(self._retired)] + [self._copy(s) for _, s in live]
+
+
+class Counter(_Sharded):
+    kind = 'counter'
+
+    def _new_shard(self): return {}
+    def _copy(self, shard): return shard.copy()
+
+    def _merge(self, into, shard):
+        for k, v in shard.items(): into[k] = into.get(k, 0) + v
+
+    def inc(self, label=None, n=1):
+        try: d = self._local.shard
+        except AttributeError: d = self._shard()
+        d[label] = d.get(label, 0) + n
+
+    def values(self):
+        total = {}
+        for shard in self._snapshot(): self._merge(total, shard)
+        return total
+
+    def value(self, label=None):
+        return self.values().get(label, 0)
+
+    def total(self):
+        return sum(self.values().values())
+
+
+class Gauge:
+    # Last value set, or fn() evaluated at read time
+    kind = 'gauge'
+
+    def __init__(self, name, help, label=None, fn=None):
+        self.name = name
+        self.help = help
+        self.label = label
+        self.fn = fn
+        self._values = {}
+
+    def set(self, value, label=None):
+        self._values[label] = value
+
+    def values(self):
+        if self.fn:
+            v = self.fn()
+            return v if isinstance(v, dict) else {None: v}
+        return dict(self._values)
+
+
+# Seconds, 1 us .. ~1 s in powers of two
+DEFAULT_BUCKETS = tuple(1e-6 * 2 ** i for i in range(21))
+
+
+class Histogram(_Sharded):
+    kind = 'histogram'
+
+    def __init__(self, name, help, buckets=DEFAULT_BUCKETS):
+        self.buckets = tuple(buckets)
+        super().__init__(name, help)
+
+    def _new_shard(self): return [0] * (len(self.buckets) + 1) + [0.0] # counts..., +Inf, sum
+    def _copy(self, shard): return list(shard)
+
+    def _merge(self, into, shard):
+        for i, v in enumerate(shard): into[i] += v
+
+    def observe(self, value):
+        try: s = self._local.shard
+        except AttributeError: s = self._shard()
+        s[bisect.bisect_left(self.buckets, value)] += 1
+        s[-1] += value
+
+    def values(self):
+        total = self._new_shard()
+        for shard in self._snapshot(): self._merge(total, shard)
+        counts = total[:-1]
+        n = sum(counts)
+        return {
+            'count': n, 'sum': total[-1],
+            'buckets': counts,
+            'p50': self._quantile(counts, n, 0.5),
+            'p99': self._quantile(counts, n, 0.99),
+        }
+
+    def _quantile(self, counts, n, q):
+        # Upper bound of the bucket holding the q-th observation
+        if not n: return 0.0
+        seen = 0
+        for i, c in enumerate(counts):
+            seen += c
+            if seen >= n * q: return self.buckets[i] if i < len(self.buckets) else float('inf')
+        return float('inf')
+
+
+def _register(metric):
+    with _registry_lock:
+        existing = _registry.get(metric.name)
+        if existing is not None:
+            if existing.kind != metric.kind: raise ValueError(f"Metric {metric.name} already registered as a {existing.kind}")
+            return existing
+        _registry[metric.name] = metric
+        return metric
+
+
+def counter(name, help='', label=None):
+    return _register(Counter(name, help, label))
+
+def gauge(name, help='', label=None, fn=None):
+    return _register(Gauge(name, help, label, fn))
+
+def histogram(name, help='', buckets=DEFAULT_BUCKETS):
+    return _register(Histogram(name, help, buckets))
+
+
+class Rate:
+    # Per-second rate of a counter over windows of at least `window` seconds,
+    # computed by whoever reads it so no sampler thread is needed
+    def __init__(self, read, window=1.0):
+        self.read = read
+        self.window = window
+        self.lock = threading.Lock()
+        self.last_value = read()
+        self.last_t = time.monotonic()
+        self.rate = 0.0
+
+    def __call__(self):
+        with self.lock:
+            now = time.monotonic()
+            dt = now - self.last_t
+            if dt >= self.window:
+                value = self.read()
+                self.rate = max(0, value - self.last_value) / dt
+                self.last_value, self.last_t = value, now
+            return self.rate
+
+
+def collect():
+    # -> {name: {'type', 'help', 'values'}}; label-less values are keyed ''
+    with _registry_lock: metrics = list(_registry.values())
+    out = {}
+    for m in metrics:
+        try: values = m.values()
+        except Exception: continue
+        if m.kind != 'histogram': values = {('' if k is None else str(k)): v for k, v in values.items()}
+        out[m.name] = {'type': m.kind, 'help': m.help, 'values': values}
+    return out
+
+
+def render():
+    # Prometheus text exposition format
+    with _registry_lock: metrics = list(_registry.values())
+    lines = []
+    for m in metrics:
+        try: values = m.values()
+        except Exception: continue
+        lines.append(f"# HELP {m.name} {m.help}")
+        lines.append(f"# TYPE {m.name} {m.kind}")
+        if m.kind == 'histogram':
+            cum = 0
+            for le, c in zip(list(m.buckets) + ['+Inf'], values['buckets']):
+                cum += c
+                lines.append(f'{m.name}_bucket{{le="{le}"}} {cum}')
+            lines.append(f"{m.name}_sum {values['sum']}")
+            lines.append(f"{m.name}_count {values['count']}")
+            continue
+        for k, v in sorted(values.items(), key=lambda kv: str(kv[0])):
+            labels = f'{{{m.label}="{k}"}}' if m.label and k is not None else ''
+            lines.append(f"{m.name}{labels} {v}")
+    return '\n'.join(lines) + '\n'
+
+
+# --- Scrape endpoint ---
+class _HttpServer:
+    # Flask (werkzeug) when installed, http.server otherwise; both on a daemon thread
+    def __init__(self, host, port):
+        try:
+            from flask import Flask, Response
+            from werkzeug.serving import make_server
+            app = Flask('nexus-metrics')
+            app.add_url_rule('/metrics', 'metrics', lambda: Response(render(), mimetype='text/plain; version=0.0.4'))
+            app.add_url_rule('/metrics.json', 'metrics_json', lambda: Response(json.dumps(collect()), mimetype='application/json'))
+            self.server = make_server(host, port, app, threaded=True)
+            self.flavor = 'flask'
+        except ImportError:
+            from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+
+            class Handler(BaseHTTPRequestHandler):
+                def do_GET(self):
+                    if self.path == '/metrics': body, ctype = render(), 'text/plain; version=0.0.4'
+                    elif self.path == '/metrics.json': body, ctype = json.dumps(collect()), 'application/json'
+                    else:
+                        self.send_error(404)
+                        return
+                    data = body.encode()
+                    self.send_response(200)
+                    self.send_header('Content-Type', ctype)
+                    self.send_header('Content-Length', str(len(data)))
+                    self.end_headers()
+                    self.wfile.write(data)
+
+                def log_message(self, *args): pass
+
+            self.server = ThreadingHTTPServer((host, port), Handler)
+            self.server.daemon_threads = True
+            self.flavor = 'http.server'
+        self.port = self.server.server_address[1]
+        self.thread = threading.Thread(target=self.server.serve_forever, name='metrics-http', daemon=True)
+        self.thread.start()
+
+    def stop(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+
+_server = None
+
+def serve(port, host='127.0.0.1'):
+    # Local only by default; -> bound port (port 0 picks a free one)
+    global _server
+    stop()
+    _server = _HttpServer(host, port)
+    print(f"Metrics on http://{host}:{_server.port}/metrics ({_server.flavor})")
+    return _server.port
+
+def stop():
+    global _server
+    if _server:
+        _server.stop()
+        _server = None
@@ -0,0 +1,157 @@
+# --- Mouse output engine ---
+# Cursor motion runs on its own fixed-rate timer instead of once per packet:
+# gyro deflection sets a target velocity (px/s) that is smoothed and held
+# between packets, trackpad deltas (0x04) are queued, and every tick emits the
+# whole-pixel part of the motion while keeping the fractional remainder, so slow
+# aims still move and the cursor rate doesn't follow network jitter. The thread
+# sleeps on a condition while nothing is moving.
+import math
+import threading
+import time
+
+LEFT = 1
+RIGHT = 2
+
+DEFAULTS = {
+    'rate': 1000,          # ticks per second while moving
+    'sensitivity': 0.5,    # px/s per gyro unit past the deadzone
+    'deadzone': 300,       # gyro units around the centre that don't move
+    'accel': 0.0,          # extra gain per 1000 gyro units of deflection (0 = linear)
+    'smoothing': 0.015,    # seconds, velocity time constant
+    'stale': 0.1,          # seconds without a gyro update before the cursor stops
+    'trackpad_scale': 1.0, # multiplier for 0x04 MOUSE deltas
+}
+
+
+class MouseEngine:
+    def __init__(self, move, press=None, release=None, buttons=None, **settings):
+        # move(dx, dy) with whole pixels; press/release(button) with buttons = {LEFT: .., RIGHT: ..}
+        self._move = move
+        self._press = press
+        self._release = release
+        self.button_map = buttons or {}
+        self.cond = threading.Condition()
+        self.settings = dict(DEFAULTS)
+        self.configure(**settings)
+
+        self.target = [0.0, 0.0] # px/s from the latest gyro sample
+        self.vel = [0.0, 0.0]
+        self.pending = [0.0, 0.0] # queued trackpad motion, px
+        self.rem = [0.0, 0.0] # sub-pixel remainder
+        self.last_gyro = 0.0
+        self.buttons = 0
+        self.running = False
+        self.thread = None
+
+        self.ticks = 0
+        self.moves = 0
+
+    def configure(self, **settings):
+        with self.cond:
+            for k, v in settings.items():
+                if k in DEFAULTS: self.settings[k] = type(DEFAULTS[k])(v)
+            s = self.settings
+            self.period = 1.0 / max(1, s['rate'])
+        return dict(self.settings)
+
+    def start(self):
+        with self.cond:
+            if self.running: return
+            self.running = True
+            if self.thread: # stopped but hasn't seen it yet: it keeps going
+                self.cond.notify()
+                return
+            self.thread = threading.Thread(target=self._run, name="mouse-engine", daemon=True)
+            self.thread.start()
+
+    def stop(self):
+        self.set_buttons(0)
+        with self.cond:
+            self.running = False
+            self.target = [0.0, 0.0]
+            self.vel = [0.0, 0.0]
+            self.pending = [0.0, 0.0]
+            self.cond.notify()
+
+    def _speed(self, d):
+        s = self.settings
+        excess = abs(d) - s['deadzone']
+        if excess <= 0: return 0.0
+        v = s['sensitivity'] * excess * (1.0 + s['accel'] * excess / 1000.0)
+        return v if d > 0 else -v
+
+    def gyro(self, dr, dp):
+        # Deflection from the centre captured when mouse mode was entered
+        tx, ty = self._speed(dr), self._speed(dp)
+        with self.cond:
+            self.target[0], self.target[1] = tx, ty
+            self.last_gyro = time.perf_counter()
+            if tx or ty: self.cond.notify()
+        if not self.running and (tx or ty): self.start()
+
+    def gyro_stop(self):
+        with self.cond: self.target = [0.0, 0.0]
+
+    def delta(self, dx, dy):
+        scale = self.settings['trackpad_scale']
+        with self.cond:
+            self.pending[0] += dx * scale
+            self.pending[1] += dy * scale
+            self.cond.notify()
+        if not self.running: self.start()
+
+    def set_buttons(self, mask):
+        # Press/release only on change
+        changed = mask ^ self.buttons
+        if not changed: return
+        self.buttons = mask
+        for bit in (LEFT, RIGHT):
+            if not changed & bit: continue
+            fn = self._press if mask & bit else self._release
+            try:
+                if fn: fn(self.button_map.get(bit, bit))
+            except: pass
+
+    def _idle(self):
+        return not (self.target[0] or self.target[1] or self.vel[0] or self.vel[1]
+                    or self.pending[0] or self.pending[1])
+
+    def _run(self):
+        last = time.perf_counter()
+        next_t = last
+        while True:
+            with self.cond:
+                if self._idle():
+                    self.rem = [0.0, 0.0]
+                    while self.running and self._idle(): self.cond.wait()
+                    last = next_t = time.perf_counter()
+                if not self.running:
+                    self.thread = None # under the lock, so start() knows to make a new one
+                    return
+                now = time.perf_counter()
+                dt = now - last
+                last = now
+                if now - self.last_gyro > self.settings['stale']: self.target = [0.0, 0.0]
+                a = 1.0 - math.exp(-dt / max(1e-4, self.settings['smoothing']))
+                out = [0, 0]
+                for i in (0, 1):
+                    v = self.vel[i] + (self.target[i] - self.vel[i]) * a
+                    if abs(v) < 1.0 and not self.target[i]: v = 0.0 # settled
+                    self.vel[i] = v
+                    f = v * dt + self.pending[i] + self.rem[i]
+                    self.pending[i] = 0.0
+                    out[i] = int(f) # toward zero; the rest carries over
+                    self.rem[i] = f - out[i]
+                period = self.period
+            self.ticks += 1
+            if out[0] or out[1]:
+                self.moves += 1
+                try: self._move(out[0], out[1])
+                except: pass
+            next_t += period
+            delay = next_t - time.perf_counter()
+            if delay > 0: time.sleep(delay)
+            else: next_t = time.perf_counter() # fell behind, don't try to catch up
+
+    def stats(self):
+        return {'ticks': self.ticks, 'moves': self.moves, 'running': self.running}
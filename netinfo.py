@@ -0,0 +1,90 @@
+# --- Local address cache ---
+# Enumerating addresses means a hostname lookup plus a UDP connect() probe, which
+# fails (or stalls on a slow resolver) on offline LANs. Do it once, then only
+# again when the interfaces or their addresses change (new DHCP lease
+# on the same NIC) or a caller asks for it, so the dashboard's reads are plain
+# in-memory lookups.
+import socket
+import threading
+import time
+
+try: import psutil # optional: per-interface addresses without a hostname lookup
+except ImportError: psutil = None
+
+PROBE_ADDR = ("8.8.8.8", 80) # connect() on UDP only picks a route, nothing is sent
+CHECK_INTERVAL = 5.0 # seconds between interface-change checks
+
+_lock = threading.Lock()
+_primary = None
+_ips = []
+_signature = None
+_checked = 0.0
+refreshes = 0
+
+
+def local_addresses():
+    # IPv4 addresses on this machine's interfaces, from local enumeration only
+    if psutil:
+        return sorted(a.address for nic in psutil.net_if_addrs().values() for a in nic if a.family == socket.AF_INET)
+    return sorted({ai[4][0] for ai in socket.getaddrinfo(socket.gethostname(), None, socket.AF_INET)})
+
+
+def interface_signature():
+    # Interface names + their addresses, so a new lease on the same NIC shows up;
+    # the route probe to PROBE_ADDR is left to refresh()
+    try: names = tuple(socket.if_nameindex())
+    except: names = None
+    try: addrs = tuple(local_addresses())
+    except: addrs = None
+    return names, addrs
+
+
+def probe_primary():
+    # Address of the interface that holds the default route, None when offline
+    s = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+    try:
+        s.connect(PROBE_ADDR)
+        return s.getsockname()[0]
+    except: return None
+    finally: s.close()
+
+
+def enumerate_ips():
+    try: ips = socket.gethostbyname_ex(socket.gethostname())[2]
+    except: ips = []
+    return [ip for ip in dict.fromkeys(ips) if not ip.startswith("127.")]
+
+
+def refresh():
+    global _primary, _ips, _signature, _checked, refreshes
+    signature = interface_signature()
+    ips = enumerate_ips()
+    primary = probe_primary()
+    # Offline: fall back to the first LAN address instead of loopback
+    if not primary or primary.startswith("0."): primary = ips[0] if ips else "127.0.0.1"
+    if primary not in ips and primary != "127.0.0.1": ips.insert(0, primary)
+    with _lock:
+        _primary, _ips, _signature = primary, ips or [primary], signature
+        _checked = time.monotonic()
+        refreshes += 1
+    return _ips
+
+
+def _current():
+    # Re-enumerate on first use or when an interface or its address has changed
+    global _checked
+    if _primary is None: return refresh()
+    now = time.monotonic()
+    if now - _checked >= CHECK_INTERVAL:
+        _checked = now
+        if interface_signature() != _signature: return refresh()
+    return _ips
+
+
+def primary_ip():
+    _current()
+    return _primary
+
+
+def local_ips():
+    return list(_current())
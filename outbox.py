@@ -0,0 +1,112 @@
+# --- Outbound (server -> phone) path ---
+# One writer thread per connection owns every send on that socket, so the ViGEm
+# notification thread, the GUI and the reader/event loop only hand data over and
+# return. Control replies (READY, PONG, UDP_BIND) go out in order; rumble is a
+# single latest-value slot flushed at most every RUMBLE_INTERVAL, so a burst of
+# motor updates or a slow phone collapses to the newest state instead of queueing.
+import threading
+import time
+from collections import deque
+
+import metrics
+
+OP_RUMBLE = 0x03
+RUMBLE_INTERVAL = 1 / 60 # seconds between rumble frames per phone
+MAX_CONTROL = 64 # queued control replies before new ones are dropped
+
+TX_FRAMES = metrics.counter('nexus_tx_frames_total', 'Frames sent to phones', label='kind')
+
+
+class Outbox:
+    def __init__(self, sock, name="outbox", rumble_interval=RUMBLE_INTERVAL):
+        self.sock = sock
+        self.rumble_interval = rumble_interval
+        self.cond = threading.Condition()
+        self.control = deque()
+        self.pending = None # (large, small) not yet sent
+        self.last_sent = None
+        self.next_rumble = 0.0
+        self.closed = False
+
+        self.sent = 0
+        self.coalesced = 0 # rumble states replaced by a newer one (or equal to what the phone has)
+        self.dropped = 0 # rumble states never delivered: send failed or session closed
+        self.control_dropped = 0
+
+        self.thread = threading.Thread(target=self._run, name=name, daemon=True)
+        self.thread.start()
+
+    def send(self, data):
+        with self.cond:
+            if self.closed or len(self.control) >= MAX_CONTROL:
+                self.control_dropped += 1
+                return False
+            self.control.append(data)
+            self.cond.notify()
+        return True
+
+    def rumble(self, large, small):
+        # Never blocks: overwrite the pending state and let the writer pick it up
+        state = (large & 0xFF, small & 0xFF)
+        with self.cond:
+            if self.closed:
+                self.dropped += 1
+                return
+            if self.pending is not None:
+                self.coalesced += 1
+            elif state == self.last_sent:
+                self.coalesced += 1
+                return
+            self.pending = state
+            self.cond.notify()
+
+    def close(self):
+        with self.cond:
+            if self.closed: return
+            self.closed = True
+            if self.pending is not None:
+                self.dropped += 1
+                self.pending = None
+            self.control.clear()
+            self.cond.notify()
+
+    def _next(self):
+        # -> bytes to send, or None once closed; waits for work / the rumble rate limit
+        with self.cond:
+            while not self.closed:
+                if self.control:
+                    return self.control.popleft()
+                if self.pending is not None:
+                    wait = self.next_rumble - time.monotonic()
+                    if wait <= 0:
+                        large, small = self.last_sent = self.pending
+                        self.pending = None
+                        self.next_rumble = time.monotonic() + self.rumble_interval
+                        return bytes([OP_RUMBLE, large, small])
+                    self.cond.wait(wait)
+                else:
+                    self.cond.wait()
+            return None
+
+    def _run(self):
+        while True:
+            data = self._next()
+            if data is None: return
+            try:
+                self.sock.sendall(data)
+                self.sent += 1
+                TX_FRAMES.inc('rumble' if data[0] == OP_RUMBLE else 'control')
+            except OSError:
+                # Connection is gone; the reader side notices and closes the session
+                if data[0] == OP_RUMBLE: self.dropped += 1
+                self.close()
+                return
+
+    def stats(self):
+        return {
+            'sent': self.sent,
+            'coalesced': self.coalesced,
+            'dropped': self.dropped,
+            'control_dropped': self.control_dropped,
+            'pending': len(self.control) + (self.pending is not None)
+        }
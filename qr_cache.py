@@ -0,0 +1,115 @@
+# --- Connect QR code ---
+# The dashboard's QR is built on a worker thread and cached by (ip, port, colour)
+# in memory and as .svg files on disk, so INITIALIZE never waits on the encoder
+# and a restart on the same network reuses yesterday's image. Output is a small
+# SVG (one path of horizontal runs) instead of a PIL-rendered PNG, which also
+# keeps PIL out of the process entirely. The page gets only the cache key with
+# the server state and fetches the SVG once per key.
+import hashlib
+import os
+import threading
+from collections import deque
+
+CACHE_DIR = "qr_cache"
+MEMORY_SIZE = 8 # SVGs kept in memory (a few KB each)
+
+
+def qr_key(ip, port, color):
+    return hashlib.sha1(f"{ip}|{port}|{color}".encode()).hexdigest()[:16]
+
+
+def render_svg(data, color, border=1):
+    # Module matrix from qrcode (pure Python, no PIL needed) -> one <path>
+    import qrcode # deferred: only needed the first time a QR isn't cached
+    qr = qrcode.QRCode(border=border)
+    qr.add_data(data)
+    qr.make(fit=True)
+    rows = qr.get_matrix()
+    size = len(rows)
+    d = []
+    for y, row in enumerate(rows):
+        x = 0
+        while x < size:
+            if not row[x]:
+                x += 1
+                continue
+            start = x
+            while x < size and row[x]: x += 1
+            d.append(f"M{start} {y}h{x - start}v1h-{x - start}z")
+    return (f'<svg xmlns="http://www.w3.org/2000/svg" viewBox="0 0 {size} {size}" shape-rendering="crispEdges">'
+            f'<path fill="{color}" d="{"".join(d)}"/></svg>')
+
+
+class QrCache:
+    def __init__(self, cache_dir=CACHE_DIR):
+        self.cache_dir = cache_dir
+        self.cond = threading.Condition()
+        self.memory = {} # key -> svg, insertion order = age
+        self.queue = deque()
+        self.failed = {} # key -> error
+        self.thread = None
+
+        self.hits = 0
+        self.disk_hits = 0
+        self.generated = 0
+
+    def request(self, ip, port, color):
+        # -> cache key, right away; the SVG is ready now or shortly via get(key)
+        key = qr_key(ip, port, color)
+        with self.cond:
+            if key in self.memory:
+                self.hits += 1
+                return key
+            self.failed.pop(key, None)
+            if (key, ip, color) not in self.queue: self.queue.append((key, ip, color))
+            if not self.thread or not self.thread.is_alive():
+                self.thread = threading.Thread(target=self._run, name="qr-worker", daemon=True)
+                self.thread.start()
+            self.cond.notify()
+        return key
+
+    def get(self, key, timeout=5.0):
+        # -> svg, or None if it failed / isn't ready within timeout
+        with self.cond:
+            self.cond.wait_for(lambda: key in self.memory or key in self.failed, timeout)
+            return self.memory.get(key)
+
+    def _path(self, key):
+        return os.path.join(self.cache_dir, key + ".svg")
+
+    def _load_or_render(self, key, ip, color):
+        try:
+            with open(self._path(key), encoding="utf-8") as f:
+                svg = f.read()
+            self.disk_hits += 1
+            return svg
+        except OSError: pass
+        svg = render_svg(ip, color)
+        self.generated += 1
+        try:
+            os.makedirs(self.cache_dir, exist_ok=True)
+            with open(self._path(key), "w", encoding="utf-8") as f: f.write(svg)
+        except OSError: pass # read-only install dir: memory cache still works
+        return svg
+
+    def _run(self):
+        while True:
+            with self.cond:
+                if not self.queue:
+                    # Idle: exit, request() starts a new worker when needed
+                    self.thread = None
+                    return
+                key, ip, color = self.queue.popleft()
+            try: svg, error = self._load_or_render(key, ip, color), None
+            except Exception as e: svg, error = None, str(e)
+            with self.cond:
+                if svg is None:
+                    self.failed[key] = error
+                    print(f"QR generation failed: {error}")
+                else:
+                    if len(self.memory) >= MEMORY_SIZE: del self.memory[next(iter(self.memory))]
+                    self.memory[key] = svg
+                self.cond.notify_all()
+
+    def stats(self):
+        return {'hits': self.hits, 'disk_hits': self.disk_hits, 'generated': self.generated, 'queued': len(self.queue)}
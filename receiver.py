@@ -1,35 +1,103 @@
 import socket
-import vgamepad as vg
 import struct
 import time
 import subprocess
 import os
 import threading
 import functools
-import ctypes
-
-# Try importing pynput for Mouse/Keyboard emulation
-try:
-    from pynput.keyboard import Controller as KController, KeyCode, Key
-    from pynput.mouse import Controller as MController, Button
-    keyboard = KController()
-    mouse = MController()
-    HAS_KEYBOARD = True
-    print("Keyboard & Mouse emulation enabled (pynput).")
-except ImportError:
-    try:
-        from pynput.keyboard import Controller as KController, KeyCode
-        from pynput.mouse import Controller as MController, Button
-        class Key:
-            backspace = "backspace" 
-            enter = "enter"
-        keyboard = KController()
-        mouse = MController()
-        HAS_KEYBOARD = True
-        print("Keyboard & Mouse emulation enabled (pynput) - Partial.")
-    except ImportError:
-        print("Warning: 'pynput' not found. Custom keys will be ignored.")
-        HAS_KEYBOARD = False
+import selectors
+from framing import FrameReader, OP_HELLO_EX, OP_SESSION, TLV_TOKEN, TLV_CONTROLLER, CONTROLLER_KINDS, TOKEN_SIZE, parse_tlv, RX_BYTES
+from outbox import Outbox
+from udp_input import UdpInput, UDP_PORT
+import backends
+import netinfo
+from discovery import DiscoveryResponder, DISCOVERY_PORT
+from slots import SlotAllocator
+import remap
+from response import Response
+import mouse_engine
+from injector import TextInjector, HAS_SENDINPUT
+import recorder
+import metrics
+from telemetry import LatencyStats, FrameTiming, summarize_latency
+from decode import decode_frame, iter_bits, SIGNED, VISUAL, VISUAL_INV, TRIGGER_VISUAL, BUTTON_MASK, MOUSE_MODE_BIT
+
+# pynput (Mouse/Keyboard emulation) is imported on the first mouse/keyboard event,
+# not at startup: importing it and creating the controllers costs noticeable time
+# before the dashboard can draw. HAS_KEYBOARD stays None until then.
+HAS_KEYBOARD = None
+keyboard = mouse = Key = Button = None
+input_lock = threading.Lock()
+
+def load_input():
+    # -> True once pynput's keyboard/mouse controllers are ready
+    global HAS_KEYBOARD, keyboard, mouse, Key, Button
+    if HAS_KEYBOARD is not None: return HAS_KEYBOARD
+    with input_lock:
+        if HAS_KEYBOARD is not None: return HAS_KEYBOARD
+        try:
+            from pynput.keyboard import Controller as KController
+            from pynput.mouse import Controller as MController, Button
+            try: from pynput.keyboard import Key
+            except ImportError:
+                class Key:
+                    backspace = "backspace" 
+                    enter = "enter"
+                print("Keyboard & Mouse emulation enabled (pynput) - Partial.")
+            else: print("Keyboard & Mouse emulation enabled (pynput).")
+            keyboard = KController()
+            mouse = MController()
+            HAS_KEYBOARD = True
+        except ImportError:
+            print("Warning: 'pynput' not found. Custom keys will be ignored.")
+            HAS_KEYBOARD = False
+    return HAS_KEYBOARD
+
+# Gyro mouse (mouse mode) and the 0x04 trackpad both go through one fixed-rate
+# engine; created on first use since it needs pynput
+mouse_out = None
+MOUSE_SETTINGS = {}
+
+def get_mouse_engine():
+    global mouse_out
+    if mouse_out is None and load_input():
+        mouse_out = mouse_engine.MouseEngine(mouse.move, mouse.press, mouse.release,
+            buttons={mouse_engine.LEFT: Button.left, mouse_engine.RIGHT: Button.right}, **MOUSE_SETTINGS)
+    return mouse_out
+
+def configure_mouse(**settings):
+    # sensitivity / deadzone / accel / rate / smoothing / trackpad_scale, see mouse_engine.DEFAULTS
+    MOUSE_SETTINGS.update(settings)
+    if mouse_out: return mouse_out.configure(**settings)
+    return dict(mouse_engine.DEFAULTS, **MOUSE_SETTINGS)
+
+# TEXT (0x02) is typed on its own worker so a paste never stalls the reader
+text_out = None
+
+def get_text_injector():
+    # SendInput (Windows) types without pynput; pynput is only needed as the fallback
+    global text_out
+    if text_out is None and (load_input() or HAS_SENDINPUT):
+        text_out = TextInjector(keyboard, Key)
+    return text_out
+
+def get_text_stats():
+    # depth = strings waiting for the injector
+    if text_out: return text_out.stats()
+    return {'depth': 0, 'pending_chars': 0, 'max_depth': 0, 'batches': 0, 'injected': 0, 'dropped': 0}
+
+# Dashboard key names (lowercased JS KeyboardEvent.key) that differ from pynput's Key members
+KEY_ALIASES = {
+    'escape': 'esc', 'control': 'ctrl', 'arrowup': 'up', 'arrowdown': 'down',
+    'arrowleft': 'left', 'arrowright': 'right', 'pageup': 'page_up', 'pagedown': 'page_down',
+    'capslock': 'caps_lock', 'meta': 'cmd', ' ': 'space'
+}
+
+def resolve_key(name):
+    # -> something keyboard.press() accepts, None if it can't be typed here
+    if not name or not load_input(): return None
+    if len(name) == 1: return name
+    return getattr(Key, KEY_ALIASES.get(name, name), None)
 
 # --- ADB / USB Support ---
 def run_command_silently(cmd_args, **kwargs):
@@ -68,35 +136,101 @@ def setup_adb():
         print("Warning: ADB not found. USB mode requires 'adb reverse tcp:6000 tcp:6000'.")
 
 # --- Utilities ---
-def recvall(sock, n):
-    data = b''
-    while len(data) < n:
-        try:
-            chunk = sock.recv(n - len(data))
-            if not chunk: return None
-            data += chunk
-        except: return None
-    return data
-
 def get_local_ip():
-    try:
-        s = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
-        s.connect(("8.8.8.8", 80))
-        ip = s.getsockname()[0]
-        s.close()
-        return ip
-    except: return "127.0.0.1"
+    # Cached; see netinfo.py for when it re-probes
+    return netinfo.primary_ip()
 
 # --- Globals ---
-packet_counter = 0
-current_pps = 0
-MAX_PLAYERS = 4
+frames_skipped = 0 # stale DATA frames dropped by FrameReader coalescing, closed sessions
+frames_edges = 0   # superseded DATA frames still applied because buttons changed
+
+# Metrics (see metrics.py); sharded per thread, so no lock on the frame path
+OP_NAMES = {0x01: 'data', 0x02: 'text', 0x04: 'mouse', 0x05: 'scroll', 0x06: 'udp_bind',
+            0x10: 'hello', OP_HELLO_EX: 'hello_ex', 0xF0: 'ping'}
+FRAMES = metrics.counter('nexus_frames_total', 'Frames handled, by opcode', label='op')
+DRIVER_UPDATES = metrics.counter('nexus_driver_updates_total', 'Reports pushed to a virtual pad')
+SESSIONS = metrics.counter('nexus_sessions_total', 'Session events', label='event')
+DECODE_TIME = metrics.histogram('nexus_decode_seconds', 'DATA frame decode time')
+DRIVER_TIME = metrics.histogram('nexus_driver_update_seconds', 'Time in the pad backend per applied report')
+data_rate = metrics.Rate(lambda: FRAMES.value('data'))
+metrics.gauge('nexus_data_fps', 'DATA frames per second', fn=data_rate)
+MAX_PLAYERS = 4 # default capacity, change with set_capacity() while stopped
+TCP_PORT = 6000
+UDP_INPUT_PORT = UDP_PORT
 HAPTICS_ENABLED = True
-IS_DS4_GLOBAL = False 
+IS_DS4_GLOBAL = False # pad type for clients that don't ask for one in HELLO_EX
 running = False
 
+# Where virtual pads go: "vigem" (X360/DS4 via ViGEmBus), "null" or "recording"
+output_backend = backends.get_backend("vigem")
+
+# Pads handed out on connect and parked on disconnect; PREWARM pads per kind are
+# created in the background when the server starts (0 = create on first use)
+PREWARM = {'x360': 0, 'ds4': 0}
+gamepad_pool = backends.GamepadPool(output_backend)
+
+# "threaded" = one reader thread per player, "selector" = all players served from one event loop
+SERVER_MODE = "threaded"
+active_mode = None
+
+# Optional UDP channel for DATA frames (see udp_input.py); TCP stays the control channel.
+# Off by default: the Android app doesn't send UDP_BIND or datagrams yet (--udp turns it on)
+UDP_INPUT_ENABLED = False
+udp_input = None
+
 server_sock = None
-discovery_sock = None
+discovery = None
+
+# Opt-in session recording (see recorder.py); every received frame is appended
+recording = None
+
+def start_recording(path):
+    global recording
+    stop_recording()
+    recording = recorder.Recorder(path)
+    print(f"Recording input to {path}")
+    return recording.stats()
+
+def stop_recording():
+    global recording
+    rec, recording = recording, None
+    if not rec: return None
+    rec.close()
+    st = rec.stats()
+    print(f"Recording saved: {st['records']} records, {st['bytes'] // 1024} KiB ({st['path']})")
+    return st
+
+# State-change listeners, called as fn(event, idx) from whichever thread made the change:
+#   'server'  started/stopped      'player'  slot idx connected/disconnected
+#   'visuals' slot idx applied a new report
+# Keep them cheap (mark dirty, set an event); the GUI does the actual work on its own thread.
+listeners = []
+
+def subscribe(fn):
+    listeners.append(fn)
+
+def publish(event, idx=None):
+    if idx is not None and idx < 0: return # unseated connection, no player row yet
+    for fn in listeners:
+        try: fn(event, idx)
+        except: pass
+
+# Session resumption: a phone that sent HELLO_EX gets a token; if it drops, its
+# slot and pad are held (neutral) for RESUME_GRACE seconds so a reconnect with
+# that token reattaches instead of unplugging/replugging the controller
+RESUME_GRACE = 15.0
+EXPIRE_INTERVAL = 1.0 # seconds between held-session sweeps in the server loop
+next_expire = 0.0
+PENDING = -1 # index of a connection accepted while full, until its handshake seats it
+unseated = set() # PENDING sessions, closed by stop_server
+sessions_by_token = {} # token -> PlayerSession
+session_lock = threading.RLock()
+
+# Outbound counters folded in from closed sessions (live ones are on player.outbox)
+output_totals = {'sent': 0, 'coalesced': 0, 'dropped': 0, 'control_dropped': 0}
+
+# Last report pushed to the driver: (lx, ly, rx, ry, lt, rt, buttons), sticks as raw bytes
+NEUTRAL_REPORT = (0, 0, 0, 0, 0, 0, 0)
 
 # --- Player Class ---
 class PlayerSession:
@@ -109,313 +243,622 @@ class PlayerSession:
         
         # State
         self.packet_count = 0
-        self.current_keys = set()
+        self.driver_updates = 0
+        self.last_report = NEUTRAL_REPORT
+        self.key_state = 0 # button bits currently holding a mapped keyboard key down
         
         # Mouse Mode State
         self.was_mouse_mode = False
         self.center_roll = 0
         self.center_pitch = 0
-        self.msg_l_clicked = False
-        self.msg_r_clicked = False
-        self.last_mouse_btns = 0
         self.joystick_center_roll = None
         self.joystick_center_pitch = None
         
         # Mapping / Visuals
         self.key_map = {}
+        self.remap = None # compiled key_map, see remap.py / set_key_map
+        self.response = None # deadzone/curve tables, see response.py / set_response
         self.visuals = {'lx':0,'ly':0,'rx':0,'ry':0,'lt':0,'rt':0,'active':False}
 
-    def get_gamepad(self, is_ds4=False):
-        if self.gamepad: return self.gamepad
-        try:
-            if is_ds4:
-                self.gamepad = vg.VDS4Gamepad()
-                print(f"Player {self.index+1}: DS4 Created")
-            else:
-                self.gamepad = vg.VX360Gamepad()
+        self.reader = None
+        self.outbox = None
+        self.kind = None # pad type the client asked for ('x360'/'ds4'), None = server default
+        self.ops = None # the pad's bound methods, see get_gamepad
+        # DATA arrives on the TCP reader and the UDP thread in threaded mode; one
+        # frame at a time per player (last_report, diff state, single-writer rings),
+        # and never while the pad is swapped or torn down. Reentrant: the frame path
+        # can create the pad (get_gamepad -> park_gamepad)
+        self.frame_lock = threading.RLock()
+        self.pad_failed = False # pad creation failed this session: DATA frames don't retry, the next HELLO does
+        self.token = None # set once the client asks for a resumable session (HELLO_EX)
+        self.detached_at = None # monotonic time the connection dropped, while held for resume
+        self.latency = LatencyStats()
+        self.timing = FrameTiming()
+
+    def get_gamepad(self, kind=None):
+        with self.frame_lock:
+            kind = kind or self.kind or ('ds4' if IS_DS4_GLOBAL else 'x360')
+            if self.gamepad:
+                if self.gamepad.kind == kind: return self.gamepad
+                self.park_gamepad() # resumed/reused slot asked for the other type
+            try:
+                self.gamepad, hit = gamepad_pool.acquire(kind)
                 # Use partial to bind player_idx
-                self.gamepad.register_notification(callback_function=functools.partial(rumble_callback, self.index))
-                print(f"Player {self.index+1}: X360 Created")
-        except Exception as e:
-            print(f"Failed to create gamepad: {e}")
-        return self.gamepad
+                self.gamepad.on_rumble = functools.partial(rumble_callback, self.index)
+                # Bind the pad's handlers once here, so the frame path does no per-frame lookup or type dispatch
+                gp = self.gamepad
+                self.ops = (gp.left_stick, gp.right_stick, gp.left_trigger, gp.right_trigger, gp.buttons, gp.update)
+                self.pad_failed = False
+                print(f"Player {self.index+1}: {self.gamepad.kind.upper()} {'Attached (pooled)' if hit else 'Created'} ({gamepad_pool.backend.name})")
+            except Exception as e:
+                self.pad_failed = True
+                print(f"Failed to create gamepad: {e}")
+            return self.gamepad
+
+    def park_gamepad(self):
+        # Hand the pad back to the pool (reset there) for the next player
+        gp, self.gamepad = self.gamepad, None
+        self.ops = None
+        if gp:
+            try: gamepad_pool.release(gp)
+            except Exception as e: print(f"Failed to park gamepad: {e}")
+
+    def drop_transport(self):
+        # Forget the connection (socket, reader, outbox), folding its counters into the totals
+        global frames_skipped, frames_edges
+        if self.reader:
+            frames_skipped += self.reader.data_skipped
+            frames_edges += self.reader.data_edges
+        if self.outbox:
+            self.outbox.close()
+            for k, v in self.outbox.stats().items():
+                if k in output_totals: output_totals[k] += v
+        self.connected = False
+        self.conn = None
+        self.reader = None
+        self.outbox = None
+
+    def release_keys(self):
+        held, self.key_state = self.key_state, 0
+        if not held or not self.remap: return
+        for bit in iter_bits(held):
+            try: keyboard.release(self.remap.keys[bit])
+            except: pass
 
-    def reset(self):
+    def neutral(self):
+        self.release_keys()
         if self.gamepad:
             self.gamepad.reset()
             self.gamepad.update()
-        self.connected = False
-        self.conn = None
-        self.packet_count = 0
+        self.last_report = NEUTRAL_REPORT
         self.visuals['active'] = False
 
+    def detach(self):
+        # Connection lost but resumable: pad goes neutral, slot and token are kept
+        with self.frame_lock:
+            self.drop_transport()
+            self.neutral()
+            self.detached_at = time.monotonic()
+
+    def reset(self):
+        with self.frame_lock:
+            self.drop_transport()
+            self.neutral()
+            self.park_gamepad()
+            self.packet_count = 0
+            self.driver_updates = 0
+            if self.token: sessions_by_token.pop(self.token, None)
+            self.token = None
+            self.kind = None
+            self.pad_failed = False
+            self.detached_at = None
+            slot_allocator.release(self.index)
+
 players = [PlayerSession(i) for i in range(MAX_PLAYERS)]
+slot_allocator = SlotAllocator(MAX_PLAYERS)
+
+def set_capacity(n):
+    # Grow/shrink the slot list; only while the server is stopped (allocator refuses otherwise)
+    global MAX_PLAYERS
+    MAX_PLAYERS = slot_allocator.resize(n)
+    for p in players[MAX_PLAYERS:]: p.park_gamepad()
+    del players[MAX_PLAYERS:]
+    players.extend(PlayerSession(i) for i in range(len(players), MAX_PLAYERS))
+    publish('server')
+    return MAX_PLAYERS
 
 # --- Processing ---
-def map_stick(val):
-    # -127..127 -> -1.0..1.0 -> Int16
-    norm = val / 127.0
-    if norm > 1.0: norm = 1.0
-    if norm < -1.0: norm = -1.0
-    return norm, int(norm * 32000)
-
-# FIXED SIGNATURE: match vgamepad expectation strictly
-def rumble_callback(player_idx, client, target, large_motor, small_motor, led_number, user_data):
+# Called by the player's pad (see backends.VirtualPad.on_rumble)
+# Both only hand the state to the player's Outbox; its writer thread does the send
+def rumble_callback(player_idx, large_motor, small_motor):
     if not HAPTICS_ENABLED: return
     try:
         if player_idx < len(players):
-            p = players[player_idx]
-            if p.connected and p.conn:
-                # Send just large/small (0-255)
-                # Note: large_motor/small_motor are likely int 0-255 from vgamepad
-                p.conn.sendall(bytes([0x03, int(large_motor), int(small_motor)]))
+            out = players[player_idx].outbox
+            # large_motor/small_motor are int 0-255 from vgamepad
+            if out: out.rumble(int(large_motor), int(small_motor))
     except: pass
 
 def trigger_rumble(player_idx, weak, strong):
     if not HAPTICS_ENABLED: return
     try:
         if player_idx < len(players):
-            p = players[player_idx]
-            if p.connected and p.conn:
-                p.conn.sendall(bytes([0x03, int(strong*255), int(weak*255)]))
+            out = players[player_idx].outbox
+            if out: out.rumble(int(strong*255), int(weak*255))
     except: pass
 
-def process_gamepad_data(player, data):
-    global packet_counter
-    packet_counter += 1
+def process_gamepad_data(player, data, t_recv=None):
     player.packet_count += 1
     
-    if not player.gamepad: return
-
-    # Parse
-    lx, ly, rx, ry = data[0], data[1], data[2], data[3]
-    btns_low, btns_high, lt, rt = data[4], data[5], data[6], data[7]
-    
-    # Python bytes are 0-255. Protocol sends -127..127 as signed bytes.
-    # We must convert 0..255 to -128..127
-    def to_signed(b): return b - 256 if b > 127 else b
-    
-    lx = to_signed(lx)
-    ly = to_signed(ly)
-    rx = to_signed(rx)
-    ry = to_signed(ry)
-    
-    # Gyro (Big Endian Short)
-    roll = int.from_bytes(data[8:10], 'big', signed=True)
-    pitch = int.from_bytes(data[10:12], 'big', signed=True)
-    
-    is_mouse_mode = (btns_high & 0x40) != 0
+    if not player.ops and (player.pad_failed or not player.get_gamepad()): return
+
+    t_start = time.perf_counter()
+    lx, ly, rx, ry, btns_low, btns_high, lt, rt, roll, pitch, client_ms = decode_frame(data)
+    t_decoded = time.perf_counter()
+    DECODE_TIME.observe(t_decoded - t_start)
+    if t_recv is None: t_recv = t_start
+    if client_ms: player.timing.record_client(client_ms, int(time.time() * 1000) & 0xFFFFFFFF)
+    is_mouse_mode = (btns_high & MOUSE_MODE_BIT) != 0
+
+    # Deadzones / curves (precomputed tables)
+    rs = player.response
+    if rs:
+        if rs.left:
+            v = rs.left[lx << 8 | ly]; lx = v >> 8; ly = v & 0xFF
+        if rs.right:
+            v = rs.right[rx << 8 | ry]; rx = v >> 8; ry = v & 0xFF
+        if rs.trigger:
+            lt = rs.trigger[lt]; rt = rs.trigger[rt]
 
     # Visuals
     player.visuals = {
-        'lx': lx/127.0, 'ly': -ly/127.0,
-        'rx': rx/127.0, 'ry': -ry/127.0,
-        'lt': lt/255.0, 'rt': rt/255.0,
+        'lx': VISUAL[lx], 'ly': VISUAL_INV[ly],
+        'rx': VISUAL[rx], 'ry': VISUAL_INV[ry],
+        'lt': TRIGGER_VISUAL[lt], 'rt': TRIGGER_VISUAL[rt],
         'active': True
     }
 
     # Mouse Mode Logic (Player 1 only typically)
-    if player.index == 0 and HAS_KEYBOARD and is_mouse_mode:
+    if player.index == 0 and is_mouse_mode and load_input():
+        engine = get_mouse_engine()
         if not player.was_mouse_mode:
             player.center_roll = roll
             player.center_pitch = pitch
         
         player.was_mouse_mode = True
         
-        # Deadzone
-        dr = roll - player.center_roll
-        dp = pitch - player.center_pitch
-        
-        dx, dy = 0, 0
-        if abs(dr) > 300: dx = int(dr / 200)
-        if abs(dp) > 300: dy = int(dp / 200)
-        mouse.move(dx, dy)
+        # Deflection from the centre sets cursor velocity; the engine moves it between packets
+        engine.gyro(roll - player.center_roll, pitch - player.center_pitch)
         
-        # Click Emulation
-        if rt > 100 and not player.msg_l_clicked:
-            mouse.press(Button.left); player.msg_l_clicked = True
-        elif rt <= 100 and player.msg_l_clicked:
-            mouse.release(Button.left); player.msg_l_clicked = False
-            
-        if lt > 100 and not player.msg_r_clicked:
-            mouse.press(Button.right); player.msg_r_clicked = True
-        elif lt <= 100 and player.msg_r_clicked:
-            mouse.release(Button.right); player.msg_r_clicked = False
+        # Click Emulation (RT = left, LT = right), pressed/released on change only
+        engine.set_buttons((rt > 100) * mouse_engine.LEFT | (lt > 100) * mouse_engine.RIGHT)
             
         # Zero out controller inputs while in mouse mode
         lt = rt = 0
-    else:
+    elif player.was_mouse_mode:
         player.was_mouse_mode = False
-        if player.msg_l_clicked: mouse.release(Button.left); player.msg_l_clicked=False
-        if player.msg_r_clicked: mouse.release(Button.right); player.msg_r_clicked=False
-
-    # Helper to apply to gamepad
-    gp = player.gamepad
-    
-    lx_f, lx_i = map_stick(lx)
-    ly_f, ly_i = map_stick(ly)
-    rx_f, rx_i = map_stick(rx)
-    ry_f, ry_i = map_stick(ry)
-    
-    # Invert Y for Games
-    ly_f, ly_i = -ly_f, -ly_i
-    ry_f, ry_i = -ry_f, -ry_i
-
-    # X360 vs DS4
-    if isinstance(gp, vg.VDS4Gamepad):
-        gp.left_joystick_float(lx_f, ly_f)
-        gp.right_joystick_float(rx_f, ry_f)
-        gp.left_trigger(lt)
-        gp.right_trigger(rt)
-        
-        # DS4 Buttons
-        b = vg.DS4_BUTTONS
-        map_b = [
-            (0x01, b.DS4_BUTTON_CROSS), (0x02, b.DS4_BUTTON_CIRCLE),
-            (0x04, b.DS4_BUTTON_SQUARE), (0x08, b.DS4_BUTTON_TRIANGLE),
-            (0x10, b.DS4_BUTTON_SHOULDER_LEFT), (0x20, b.DS4_BUTTON_SHOULDER_RIGHT),
-            (0x40, b.DS4_BUTTON_SHARE), (0x80, b.DS4_BUTTON_OPTIONS)
-        ]
-        map_h = [
-            (0x01, b.DS4_BUTTON_THUMB_LEFT), (0x02, b.DS4_BUTTON_THUMB_RIGHT),
-            (0x04, b.DS4_BUTTON_DPAD_NORTH), (0x08, b.DS4_BUTTON_DPAD_SOUTH),
-            (0x10, b.DS4_BUTTON_DPAD_WEST), (0x20, b.DS4_BUTTON_DPAD_EAST)
-        ]
+        if mouse_out:
+            mouse_out.gyro_stop()
+            mouse_out.set_buttons(0)
+
+    buttons = (btns_low | btns_high << 8) & BUTTON_MASK
+
+    # Remap (compiled tables): keyboard keys fire on edges only, then pad buttons/axes
+    rm = player.remap
+    if rm:
+        if rm.key_mask:
+            down = buttons & rm.key_mask
+            edges = down ^ player.key_state
+            if edges:
+                player.key_state = down
+                keys = rm.keys
+                for bit in iter_bits(edges):
+                    try:
+                        if down >> bit & 1: keyboard.press(keys[bit])
+                        else: keyboard.release(keys[bit])
+                    except: pass
+        if rm.remaps_buttons: buttons = rm.buttons(buttons)
+        if rm.remaps_axes: lx, ly, rx, ry, lt, rt = rm.axes((lx, ly, rx, ry, lt, rt))
+
+    # Diff against the last applied report; identical frames cost no driver call
+    report = (lx, ly, rx, ry, lt, rt, buttons)
+    last = player.last_report
+    if report == last:
+        player.timing.record(t_recv, t_decoded, time.perf_counter())
+        return
+    player.last_report = report
+
+    left_stick, right_stick, left_trigger, right_trigger, set_buttons, update = player.ops
+    changed = buttons ^ last[6]
+    t_driver = time.perf_counter()
+
+    if lx != last[0] or ly != last[1]: left_stick(lx, ly)
+    if rx != last[2] or ry != last[3]: right_stick(rx, ry)
+    if lt != last[4]: left_trigger(lt)
+    if rt != last[5]: right_trigger(rt)
+    if changed: set_buttons(buttons, changed)
+    update()
+    t_done = time.perf_counter()
+    DRIVER_TIME.observe(t_done - t_driver)
+    player.timing.record(t_recv, t_decoded, t_done)
+    player.driver_updates += 1
+    DRIVER_UPDATES.inc()
+    if listeners: publish('visuals', player.index)
+
+
+def handle_frame(player, conn, h, payload, t_recv=None):
+    # Returns the session that owns conn afterwards (a resumed HELLO_EX moves it)
+    FRAMES.inc(OP_NAMES.get(h, 'other'))
+    if player.index == PENDING and not (h == OP_HELLO_EX and sessions_by_token.get(parse_tlv(payload).get(TLV_TOKEN))):
+        player = seat_pending(player) # not resuming a held session: one of them gives way
+    if h == 0x10: # HELLO
+        player.get_gamepad()
+        player.outbox.send(b'\x11') # READY
+
+    elif h == OP_HELLO_EX: # HELLO_EX -> READY + SESSION [slot][resumed][token]
+        tlv = parse_tlv(payload)
+        token = tlv.get(TLV_TOKEN)
+        ctype = tlv.get(TLV_CONTROLLER)
+        kind = CONTROLLER_KINDS.get(ctype[0]) if ctype else None
+        held = sessions_by_token.get(token) if token else None
+        resumed = held is not None and held is not player
+        if resumed:
+            player = resume_session(player, held)
+        elif not player.token:
+            player.token = os.urandom(TOKEN_SIZE)
+            sessions_by_token[player.token] = player
+        player.kind = kind
+        player.get_gamepad()
+        player.outbox.send(b'\x11' + bytes([OP_SESSION, player.index, resumed]) + player.token)
         
-        for mask, btn in map_b:
-            if btns_low & mask: gp.press_button(btn)
-            else: gp.release_button(btn)
-        for mask, btn in map_h:
-            if btns_high & mask: gp.press_button(btn)
-            else: gp.release_button(btn)
-            
-    else:
-        # X360
-        gp.left_joystick(x_value=lx_i, y_value=ly_i)
+    elif h == 0x01: # DATA
+        with player.frame_lock: process_gamepad_data(player, payload, t_recv)
         
-        # FIXED: Use correct internal variables
-        gp.right_joystick(x_value=rx_i, y_value=ry_i)
+    elif h == 0xF0: # PING
+        player.outbox.send(b'\xF1') # PONG
         
-        gp.left_trigger(lt)
-        gp.right_trigger(rt)
-        
-        b = vg.XUSB_BUTTON
-        map_b = [
-            (0x01, b.XUSB_GAMEPAD_A), (0x02, b.XUSB_GAMEPAD_B),
-            (0x04, b.XUSB_GAMEPAD_X), (0x08, b.XUSB_GAMEPAD_Y),
-            (0x10, b.XUSB_GAMEPAD_LEFT_SHOULDER), (0x20, b.XUSB_GAMEPAD_RIGHT_SHOULDER),
-            (0x40, b.XUSB_GAMEPAD_BACK), (0x80, b.XUSB_GAMEPAD_START)
-        ]
-        map_h = [
-            (0x01, b.XUSB_GAMEPAD_LEFT_THUMB), (0x02, b.XUSB_GAMEPAD_RIGHT_THUMB),
-            (0x04, b.XUSB_GAMEPAD_DPAD_UP), (0x08, b.XUSB_GAMEPAD_DPAD_DOWN),
-            (0x10, b.XUSB_GAMEPAD_DPAD_LEFT), (0x20, b.XUSB_GAMEPAD_DPAD_RIGHT)
-        ]
-        
-        for mask, btn in map_b:
-            if btns_low & mask: gp.press_button(btn)
-            else: gp.release_button(btn)
-        for mask, btn in map_h:
-            if btns_high & mask: gp.press_button(btn)
-            else: gp.release_button(btn)
-
-    gp.update()
-
+    elif h == 0x02: # TEXT
+        out = get_text_injector() if player.index == 0 else None
+        if out:
+            try: out.submit(str(payload, 'utf-8'))
+            except: pass
 
-def handle_client(conn, addr, player):
-    print(f"MSG: Player {player.index+1} connected from {addr}")
+    elif h == 0x04: # MOUSE
+        if player.index == 0 and load_input():
+            d = payload
+            engine = get_mouse_engine()
+            engine.delta(SIGNED[d[0]], SIGNED[d[1]])
+            engine.set_buttons(d[2] & (mouse_engine.LEFT | mouse_engine.RIGHT))
+            
+    elif h == 0x05: # SCROLL
+        if player.index == 0 and load_input():
+            d = payload
+            dx = d[0] - 256 if d[0] > 127 else d[0]
+            dy = d[1] - 256 if d[1] > 127 else d[1]
+            mouse.scroll(dx, dy)
+
+    elif h == 0x06: # UDP_BIND -> [0x06][slot][port], slot 0xFF if UDP is off
+        if udp_input and udp_input.running:
+            udp_input.reset(player.index)
+            player.outbox.send(bytes([0x06, player.index]) + udp_input.port.to_bytes(2, 'big'))
+        else:
+            player.outbox.send(b'\x06\xff\x00\x00')
+
+    rec = recording # one read: stop_recording() may clear it meanwhile (a closed Recorder ignores records)
+    if rec: rec.record(player.index, h, payload)
+    return player
+
+def on_udp_frame(slot, addr, payload):
+    # Only the phone holding the TCP session for this slot may drive it over UDP
+    if slot >= len(players): return False
+    player = players[slot]
+    if not player.connected or not player.addr or player.addr[0] != addr[0]: return False
+    t0 = time.perf_counter()
+    FRAMES.inc('data')
+    RX_BYTES.inc('udp', len(payload) + 6)
+    with player.frame_lock:
+        if not player.connected: return False # torn down since the check above
+        process_gamepad_data(player, payload, t0)
+        player.latency.add(time.perf_counter() - t0)
+    rec = recording
+    if rec: rec.record(slot, 0x01, payload)
+    return True
+
+def open_session(conn, addr, player):
+    if player.index == PENDING: print(f"MSG: Connection from {addr} waiting for its handshake (server full)")
+    else: print(f"MSG: Player {player.index+1} connected from {addr}")
+    SESSIONS.inc('connect')
     player.connected = True
     player.conn = conn
     player.addr = addr
-    player.get_gamepad(IS_DS4_GLOBAL)
+    player.reader = FrameReader(conn)
+    player.outbox = Outbox(conn, name=f"P{player.index+1}-out")
+    # The pad is created on HELLO, so a connection that resumes another slot never makes one
     
     conn.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+    publish('player', player.index)
+
+def close_session(player, conn=None):
+    unseated.discard(player)
+    with session_lock:
+        # conn moved to another session by a resume (or this session was taken over): nothing to close
+        if conn is not None and player.conn is not conn: return
+        if player.token and RESUME_GRACE > 0:
+            print(f"MSG: Player {player.index+1} Disconnected (held {RESUME_GRACE:.0f}s for resume)")
+            player.detach()
+            SESSIONS.inc('detach')
+        else:
+            print(f"MSG: Player {player.index+1} Disconnected")
+            player.reset()
+            SESSIONS.inc('close')
+    rec = recording
+    if rec and player.index >= 0: rec.record(player.index, recorder.EV_CLOSE)
+    publish('player', player.index)
+
+def resume_session(temp, held):
+    # Move the new connection from the slot it was accepted on onto the held session
+    with session_lock:
+        if held.conn:
+            # Old socket still looks alive (roamed before TCP noticed): cut it; its
+            # reader sees the error and skips close_session because conn changed
+            old = held.conn
+            held.drop_transport()
+            try: old.shutdown(socket.SHUT_RDWR)
+            except OSError: pass
+        held.conn, held.addr, held.reader, held.outbox = temp.conn, temp.addr, temp.reader, temp.outbox
+        held.connected = True
+        held.detached_at = None
+        temp.conn = temp.reader = temp.outbox = None
+        temp.reset()
+        unseated.discard(temp)
+        if udp_input: udp_input.reset(held.index)
+    print(f"MSG: Player {held.index+1} resumed from {held.addr}")
+    SESSIONS.inc('resume')
+    publish('player', temp.index)
+    publish('player', held.index)
+    return held
+
+def expire_detached(force=False):
+    # Release held sessions past the grace window (all of the oldest one when force)
+    now = time.monotonic()
+    held = [p for p in players if p.detached_at is not None]
+    if force and held:
+        held.sort(key=lambda p: p.detached_at)
+        held = held[:1]
+    for p in held:
+        if force or now - p.detached_at > RESUME_GRACE:
+            with session_lock:
+                if p.detached_at is None: continue
+                p.reset()
+            SESSIONS.inc('expire')
+            publish('player', p.index)
+
+def expire_due():
+    # Server-loop timer: sweep held sessions at most every EXPIRE_INTERVAL
+    global next_expire
+    now = time.monotonic()
+    if now < next_expire: return
+    next_expire = now + EXPIRE_INTERVAL
+    expire_detached()
+
+def handle_client(conn, addr, player):
+    open_session(conn, addr, player)
+    reader = player.reader
 
     while True:
         try:
-            head = recvall(conn, 1)
-            if not head: break
+            if not reader.fill(): break
             
-            h = head[0]
-            
-            if h == 0x10: # HELLO
-                conn.sendall(b'\x11') # READY
-                
-            elif h == 0x01: # DATA
-                data = recvall(conn, 16)
-                if data: process_gamepad_data(player, data)
-                
-            elif h == 0xF0: # PING
-                conn.sendall(b'\xF1') # PONG
-                
-            elif h == 0x02: # TEXT
-                slen = recvall(conn, 1)
-                if slen:
-                    txt = recvall(conn, slen[0])
-                    if txt and HAS_KEYBOARD and player.index == 0:
-                        try:
-                            s = txt.decode('utf-8')
-                            for c in s:
-                                if c == '\b': 
-                                    keyboard.press(Key.backspace)
-                                    keyboard.release(Key.backspace)
-                                elif c == '\n':
-                                    keyboard.press(Key.enter)
-                                    keyboard.release(Key.enter)
-                                else: keyboard.type(c)
-                        except: pass
-
-            elif h == 0x04: # MOUSE
-                d = recvall(conn, 3)
-                if d and HAS_KEYBOARD and player.index == 0:
-                    dx = d[0] - 256 if d[0] > 127 else d[0]
-                    dy = d[1] - 256 if d[1] > 127 else d[1]
-                    btns = d[2]
-                    mouse.move(dx, dy)
-                    if btns & 1: mouse.press(Button.left)
-                    else: mouse.release(Button.left)
-                    if btns & 2: mouse.press(Button.right)
-                    else: mouse.release(Button.right)
-                    
-            elif h == 0x05: # SCROLL
-                d = recvall(conn, 2)
-                if d and HAS_KEYBOARD and player.index == 0:
-                    dx = d[0] - 256 if d[0] > 127 else d[0]
-                    dy = d[1] - 256 if d[1] > 127 else d[1]
-                    mouse.scroll(dx, dy)
+            t0 = time.perf_counter()
+            for h, payload in reader.frames():
+                player = handle_frame(player, conn, h, payload, t0)
+                with player.frame_lock: player.latency.add(time.perf_counter() - t0) # the UDP thread writes it too
                     
         except Exception as e:
             print(f"P{player.index+1} Error: {e}")
             break
             
-    print(f"MSG: Player {player.index+1} Disconnected")
-    player.reset()
-
-
-def discovery_loop():
-    global discovery_sock, running
+    close_session(player, conn)
+
+def claim_slot(addr=None):
+    # A reconnecting phone gets the slot (and pad) it had before if still free.
+    # Held sessions past their grace window are released first. When full but a
+    # session is held, the connection waits unseated for its handshake: a HELLO_EX
+    # with a held token resumes it, anything else seats it (seat_pending).
+    host = addr[0] if addr else None
+    expire_detached()
+    idx = slot_allocator.claim(host)
+    if idx is not None: return players[idx]
+    if not any(p.detached_at is not None for p in players): return None
+    pending = PlayerSession(PENDING)
+    unseated.add(pending)
+    return pending
+
+def seat_pending(pending):
+    # Full server, new phone: the longest-held session gives way. -> the slot's session
+    unseated.discard(pending)
+    expire_detached(force=True)
+    idx = slot_allocator.claim(pending.addr[0] if pending.addr else None)
+    if idx is None: raise ConnectionRefusedError(f"Server Full (Max {MAX_PLAYERS})")
+    player = players[idx]
+    with session_lock:
+        player.conn, player.addr, player.reader, player.outbox = pending.conn, pending.addr, pending.reader, pending.outbox
+        player.connected = True
+        pending.conn = pending.reader = pending.outbox = None
+        pending.connected = False
+    print(f"MSG: Player {idx+1} connected from {player.addr}")
+    publish('player', idx)
+    return player
+
+def serve_selector():
+    # Single-threaded event loop: accept + every player socket multiplexed on one selector
+    sel = selectors.DefaultSelector()
+    sel.register(server_sock, selectors.EVENT_READ, None)
+    if udp_input: sel.register(udp_input.sock, selectors.EVENT_READ, udp_input)
     try:
-        discovery_sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
-        discovery_sock.setsockopt(socket.SOL_SOCKET, socket.SO_BROADCAST, 1)
-        discovery_sock.bind(('0.0.0.0', 6001))
-        
         while running:
-            try:
-                data, addr = discovery_sock.recvfrom(1024)
-                if data == b'DISCOVER_CONTROLLER':
-                    resp = f"PC_SERVER:{socket.gethostname()}".encode()
-                    discovery_sock.sendto(resp, addr)
-            except: break
-    except Exception as e:
-        print(f"Discovery Error: {e}")
+            expire_due()
+            for key, _ in sel.select(timeout=0.25):
+                if udp_input and key.data is udp_input: # (None would match the listener)
+                    try: udp_input.handle_readable()
+                    except OSError: pass
+                    continue
+                if key.data is None:
+                    conn, addr = server_sock.accept()
+                    player = claim_slot(addr)
+                    if not player:
+                        print(f"Connection rejected from {addr}: Server Full (Max {MAX_PLAYERS})")
+                        conn.close()
+                        continue
+                    open_session(conn, addr, player)
+                    sel.register(conn, selectors.EVENT_READ, player)
+                    continue
+                
+                player = key.data
+                conn = key.fileobj
+                if player.conn is not conn:
+                    # Taken over by a resumed connection; this socket was already cut
+                    sel.unregister(conn)
+                    conn.close()
+                    continue
+                try:
+                    alive = player.reader.fill()
+                except OSError as e:
+                    print(f"P{player.index+1} Error: {e}")
+                    alive = False
+                if not alive:
+                    sel.unregister(conn)
+                    conn.close()
+                    close_session(player, conn)
+                    continue
+                
+                t0 = time.perf_counter()
+                owner = player
+                try:
+                    for h, payload in player.reader.frames():
+                        owner = handle_frame(owner, conn, h, payload, t0)
+                        owner.latency.add(time.perf_counter() - t0)
+                    if owner is not player: sel.modify(conn, selectors.EVENT_READ, owner)
+                except Exception as e:
+                    print(f"P{owner.index+1} Error: {e}")
+                    sel.unregister(conn)
+                    conn.close()
+                    close_session(owner, conn)
     finally:
-        if discovery_sock: discovery_sock.close()
+        sel.close()
+
+def set_key_map(idx, key_map):
+    # Replace a player's mapping and recompile it; keys held under the old map are
+    # released in the same frame_lock hold, so no DATA frame presses one in between
+    if idx >= len(players): return
+    p = players[idx]
+    key_map = dict(key_map)
+    compiled = remap.compile_map(key_map, resolve_key)
+    with p.frame_lock:
+        p.release_keys()
+        p.key_map = key_map
+        p.remap = compiled
+
+def set_response(idx, settings):
+    # settings: {'left': {...}, 'right': {...}, 'triggers': {...}}, see response.py
+    if idx >= len(players): return
+    r = Response(settings)
+    players[idx].response = r if r.active() else None
+
+def bind_key(idx, btn, target):
+    if idx >= len(players): return
+    key_map = dict(players[idx].key_map)
+    if target: key_map[btn] = target
+    else: key_map.pop(btn, None)
+    set_key_map(idx, key_map)
+
+def get_update_counters():
+    # Frames received vs. driver updates actually issued (identical frames are skipped),
+    # and stale DATA frames never applied because a newer one was already buffered
+    per_player = []
+    for p in players:
+        r = p.reader
+        per_player.append({
+            'frames': p.packet_count, 'driver_updates': p.driver_updates,
+            'skipped': r.data_skipped if r else 0, 'edges': r.data_edges if r else 0
+        })
+    return {
+        'frames': FRAMES.value('data'),
+        'driver_updates': DRIVER_UPDATES.total(),
+        'skipped': frames_skipped + sum(pp['skipped'] for pp in per_player),
+        'edges': frames_edges + sum(pp['edges'] for pp in per_player),
+        'players': per_player
+    }
+
+def get_output_stats():
+    # Rumble/control send counters, closed sessions plus the live ones
+    totals = dict(output_totals)
+    for p in players:
+        out = p.outbox
+        if not out: continue
+        for k, v in out.stats().items():
+            if k in totals: totals[k] += v
+    return totals
+
+def get_pool_stats():
+    return gamepad_pool.stats()
+
+def get_pps():
+    # DATA frames/s over the last second or more, whoever asks (dashboard, scrape)
+    return int(data_rate())
+
+metrics.gauge('nexus_players_connected', 'Phones connected', fn=lambda: sum(1 for p in players if p.connected))
+metrics.gauge('nexus_frames_skipped', 'Stale DATA frames coalesced away', fn=lambda: get_update_counters()['skipped'])
+metrics.gauge('nexus_text_queue_depth', 'TEXT strings waiting for the injector', fn=lambda: get_text_stats()['depth'])
+
+def _pool_idle():
+    st = get_pool_stats()
+    return {'x360': st['idle_x360'], 'ds4': st['idle_ds4']}
+
+metrics.gauge('nexus_pool_idle', 'Parked virtual pads', label='kind', fn=_pool_idle)
+metrics.gauge('nexus_discovery', 'Discovery responder counters', label='stat',
+              fn=lambda: {k: v for k, v in discovery.stats().items() if isinstance(v, int)} if discovery else {})
+
+def prewarm_pool():
+    for kind, count in PREWARM.items():
+        if count <= 0: continue
+        try:
+            gamepad_pool.prewarm(kind, count)
+            print(f"Gamepad pool: {count} {kind.upper()} ready")
+        except Exception as e:
+            print(f"Gamepad pool prewarm failed ({kind}): {e}")
+
+def get_player_latency():
+    # Per-player p50/p95/p99 (ms) for each DATA frame stage, see telemetry.STAGES
+    return [p.timing.summary() if p.connected else None for p in players]
 
-def start_server(ip_bind=None, show_qr=False):
-    global running, server_sock
+def get_latency_report():
+    merged = []
+    per_player = []
+    for p in players:
+        vals = p.latency.values()
+        merged.extend(vals)
+        per_player.append(summarize_latency(vals))
+    report = summarize_latency(merged)
+    report['mode'] = active_mode or SERVER_MODE
+    report['players'] = per_player
+    return report
+
+
+def start_server(ip_bind=None, show_qr=False, mode=None):
+    global running, server_sock, active_mode, udp_input, gamepad_pool, discovery
     
     stop_server()
     running = True
+    active_mode = mode or SERVER_MODE
+    for p in players:
+        p.latency.clear()
+        p.timing.clear()
+    publish('server')
+    if gamepad_pool.backend is not output_backend:
+        for p in players: p.gamepad = p.ops = None
+        gamepad_pool = backends.GamepadPool(output_backend)
+    threading.Thread(target=prewarm_pool, daemon=True).start()
     setup_adb()
     
     # Firewall
@@ -424,36 +867,60 @@ def start_server(ip_bind=None, show_qr=False):
         subprocess.run([
             "netsh", "advfirewall", "firewall", "add", "rule", 
             "name=NexusControllerTCP", "dir=in", "action=allow", 
-            "protocol=TCP", "localport=6000"
+            "protocol=TCP", f"localport={TCP_PORT}"
         ], capture_output=True)
+        if UDP_INPUT_ENABLED:
+            subprocess.run(["netsh", "advfirewall", "firewall", "delete", "rule", "name=NexusControllerUDP"], capture_output=True)
+            subprocess.run([
+                "netsh", "advfirewall", "firewall", "add", "rule", 
+                "name=NexusControllerUDP", "dir=in", "action=allow", 
+                "protocol=UDP", f"localport={UDP_INPUT_PORT}"
+            ], capture_output=True)
     except: pass
 
-    threading.Thread(target=discovery_loop, daemon=True).start()
+    try:
+        discovery = DiscoveryResponder(DISCOVERY_PORT)
+        discovery.start()
+    except Exception as e:
+        print(f"Discovery Error: {e}")
+        discovery = None
+    
+    if UDP_INPUT_ENABLED:
+        try:
+            udp_input = UdpInput(on_udp_frame, port=UDP_INPUT_PORT, host=ip_bind or '0.0.0.0')
+            if active_mode == "selector": udp_input.open()
+            else: udp_input.start()
+            print(f"UDP Input Listening on UDP {udp_input.port}")
+        except Exception as e:
+            print(f"UDP Input disabled: {e}")
+            udp_input = None
     
     try:
         server_sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
         server_sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
-        server_sock.bind(('0.0.0.0', 6000))
-        server_sock.listen(4)
-        print("Server Listening on TCP 6000")
+        server_sock.bind((ip_bind or '0.0.0.0', TCP_PORT))
+        server_sock.listen(MAX_PLAYERS)
+        if active_mode == "threaded": server_sock.settimeout(EXPIRE_INTERVAL) # wake up to expire held sessions
+        print(f"Server Listening on TCP {TCP_PORT} ({active_mode} mode)")
         
-        while running:
+        if active_mode == "selector":
+            serve_selector()
+        
+        while running and active_mode == "threaded":
+            expire_due()
             try:
                 conn, addr = server_sock.accept()
                 
                 # Assign to slot
-                assigned = False
-                for p in players:
-                    if not p.connected:
-                        t = threading.Thread(target=handle_client, args=(conn, addr, p))
-                        t.daemon = True
-                        t.start()
-                        assigned = True
-                        break
-                        
-                if not assigned:
+                p = claim_slot(addr)
+                if p:
+                    t = threading.Thread(target=handle_client, args=(conn, addr, p))
+                    t.daemon = True
+                    t.start()
+                else:
                     print(f"Connection rejected from {addr}: Server Full (Max {MAX_PLAYERS})")
                     conn.close()
+            except socket.timeout: continue
             except: break
             
     except Exception as e:
@@ -462,7 +929,14 @@ def start_server(ip_bind=None, show_qr=False):
         stop_server()
 
 def stop_server():
-    global running, server_sock, discovery_sock
+    global running, server_sock, discovery, udp_input, text_out
+    if running:
+        r = get_latency_report()
+        if r['samples']:
+            print(f"Frame latency ({r['mode']}): avg {r['avg_us']}us p50 {r['p50_us']}us p99 {r['p99_us']}us max {r['max_us']}us over {r['samples']} frames")
+        c = get_update_counters()
+        if c['skipped']:
+            print(f"Skipped {c['skipped']} stale DATA frames ({c['edges']} kept for button changes)")
     running = False
     
     if server_sock:
@@ -470,16 +944,45 @@ def stop_server():
         except: pass
         server_sock = None
         
-    if discovery_sock:
-        try: discovery_sock.close()
-        except: pass
-        discovery_sock = None
+    if discovery:
+        discovery.close()
+        discovery = None
+    
+    if udp_input:
+        udp_input.close()
+        udp_input = None
+
+    if mouse_out: mouse_out.stop()
+
+    if text_out:
+        text_out.close()
+        text_out = None
         
-    for p in players:
+    for p in players + list(unseated):
         if p.conn:
             try: p.conn.close()
             except: pass
         p.reset()
+    unseated.clear()
+    publish('server')
 
 if __name__ == "__main__":
-    start_server()
+    import argparse
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--selector", action="store_true", help="serve all players from one event loop")
+    ap.add_argument("--backend", default="vigem", choices=sorted(backends.BACKENDS))
+    ap.add_argument("--players", type=int, default=MAX_PLAYERS, help="number of player slots / virtual pads")
+    ap.add_argument("--prewarm-x360", type=int, default=0, help="X360 pads to create before anyone connects")
+    ap.add_argument("--prewarm-ds4", type=int, default=0, help="DS4 pads to create before anyone connects")
+    ap.add_argument("--record", metavar="PATH", help="record every received frame for bench/replay.py")
+    ap.add_argument("--metrics-port", type=int, default=0, help="serve /metrics on 127.0.0.1:PORT")
+    ap.add_argument("--udp", action="store_true", help=f"accept DATA over UDP {UDP_INPUT_PORT} (clients that send UDP_BIND)")
+    args = ap.parse_args()
+    UDP_INPUT_ENABLED = args.udp
+    PREWARM.update(x360=args.prewarm_x360, ds4=args.prewarm_ds4)
+    output_backend = backends.get_backend(args.backend)
+    set_capacity(args.players)
+    if args.record: start_recording(args.record)
+    if args.metrics_port: metrics.serve(args.metrics_port)
+    try: start_server(mode="selector" if args.selector else None)
+    finally: stop_recording()
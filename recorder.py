@@ -0,0 +1,143 @@
+# --- Session recorder / replay ---
+# Opt-in log of every opcode frame the server receives, so a reported lag spike
+# or stuck button can be played back exactly. Records are fixed 32 bytes in a
+# preallocated, memory-mapped file: appending is one struct.pack_into under a
+# lock, with no allocation and no write() syscall on the reader threads.
+#
+# File:   [header 32][record 32]...
+# Header: magic, record size, version, flags, record count, wall-clock start (ns)
+# Record: [t_ns u64][slot u8][opcode u8][len u16][payload 20]
+#         t_ns is perf_counter_ns since the recording started; payloads longer than
+#         20 bytes (TEXT, HELLO_EX) continue raw in the following records.
+# Besides the wire opcodes, EV_CLOSE marks a session ending (pad goes neutral).
+import mmap
+import os
+import struct
+import threading
+import time
+
+MAGIC = b'NXREC\x00\x00\x00'
+VERSION = 1
+RECORD_SIZE = 32
+HEADER = struct.Struct('<8sHHIQQ')
+RECORD = struct.Struct('<QBBH20s')
+INLINE = RECORD.size - 12 # payload bytes that fit in the first record
+COUNT_OFFSET = 16 # header field rewritten on every append, so a crashed recording still reads back
+
+EV_CLOSE = 0xE1
+
+DEFAULT_CAPACITY = 1 << 16 # records (2 MiB); doubled when full
+MAX_BYTES = 256 << 20
+
+
+def records_for(length):
+    # Records taken by one frame with this payload length
+    if length <= INLINE: return 1
+    return 1 + (length - INLINE + RECORD_SIZE - 1) // RECORD_SIZE
+
+
+class Recorder:
+    def __init__(self, path, capacity=DEFAULT_CAPACITY, max_bytes=MAX_BYTES):
+        self.path = path
+        self.max_bytes = max_bytes
+        self.lock = threading.Lock()
+        self.t0 = time.perf_counter_ns()
+        self.count = 0
+        self.dropped = 0 # frames refused once max_bytes was reached
+        self.closed = False
+        self.file = open(path, 'w+b')
+        self.capacity = 0
+        self.mm = None
+        self._map(capacity)
+        HEADER.pack_into(self.mm, 0, MAGIC, RECORD_SIZE, VERSION, 0, 0, time.time_ns())
+
+    def _map(self, capacity):
+        # (Re)map the file at capacity records; the old contents stay in place
+        if self.mm: self.mm.close()
+        self.file.truncate(RECORD_SIZE * (capacity + 1))
+        self.mm = mmap.mmap(self.file.fileno(), RECORD_SIZE * (capacity + 1))
+        self.capacity = capacity
+
+    def _reserve(self, n):
+        if self.count + n <= self.capacity: return True
+        grow = self.capacity
+        while self.count + n > grow: grow *= 2
+        if RECORD_SIZE * (grow + 1) > self.max_bytes:
+            grow = self.max_bytes // RECORD_SIZE - 1
+            if self.count + n > grow: return False
+        self._map(grow)
+        return True
+
+    def record(self, slot, op, payload=b''):
+        t = time.perf_counter_ns() - self.t0
+        length = len(payload)
+        n = records_for(length)
+        with self.lock:
+            if self.closed: return False
+            if not self._reserve(n):
+                self.dropped += 1
+                return False
+            off = RECORD_SIZE * (self.count + 1)
+            RECORD.pack_into(self.mm, off, t, slot, op, length, bytes(payload[:INLINE]))
+            if n > 1:
+                rest = payload[INLINE:]
+                self.mm[off + RECORD_SIZE:off + RECORD_SIZE + len(rest)] = rest
+            self.count += n
+            struct.pack_into('<Q', self.mm, COUNT_OFFSET, self.count)
+        return True
+
+    def close(self):
+        with self.lock:
+            if self.closed: return
+            self.closed = True
+            self.mm.flush()
+            self.mm.close()
+            # Trim the preallocated tail
+            self.file.truncate(RECORD_SIZE * (self.count + 1))
+            self.file.close()
+
+    def stats(self):
+        return {
+            'path': self.path, 'records': self.count, 'dropped': self.dropped,
+            'bytes': RECORD_SIZE * (self.count + 1), 'seconds': round((time.perf_counter_ns() - self.t0) / 1e9, 1)
+        }
+
+
+def read_records(path):
+    # -> (t_ns, slot, op, payload) for every frame in a recording
+    with open(path, 'rb') as f:
+        if os.fstat(f.fileno()).st_size < RECORD_SIZE: return
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            magic, size, version, _, count, _ = HEADER.unpack_from(mm, 0)
+            if magic != MAGIC or size != RECORD_SIZE:
+                raise ValueError(f"{path} is not a session recording")
+            count = min(count, len(mm) // RECORD_SIZE - 1)
+            i = 0
+            while i < count:
+                off = RECORD_SIZE * (i + 1)
+                t, slot, op, length, inline = RECORD.unpack_from(mm, off)
+                n = records_for(length)
+                if i + n > count: return # cut short mid-frame
+                if n == 1: payload = inline[:length]
+                else: payload = inline + mm[off + RECORD_SIZE:off + RECORD_SIZE + length - INLINE]
+                yield t, slot, op, payload
+                i += n
+
+
+def replay(records, apply, speed=1.0):
+    # Feed records to apply(slot, op, payload) on their original schedule scaled by
+    # speed (2.0 = twice as fast); speed <= 0 replays as fast as apply allows.
+    # -> list of how late each frame was applied, in seconds
+    lateness = []
+    start = None
+    for t, slot, op, payload in records:
+        if speed > 0:
+            now = time.perf_counter()
+            if start is None: start = now - t / 1e9 / speed
+            due = start + t / 1e9 / speed
+            wait = due - now
+            if wait > 0.002: time.sleep(wait - 0.001) # sleep most of it, spin the rest
+            while time.perf_counter() < due: pass
+            lateness.append(time.perf_counter() - due)
+        apply(slot, op, payload)
+    return lateness
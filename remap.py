@@ -0,0 +1,112 @@
+# --- Per-player remapping ---
+# A player's key_map (edited from the dashboard) is compiled into flat lookup
+# tables whenever it changes, so applying it per frame is a handful of tuple
+# indexes instead of walking the dict.
+#
+# key_map entries:
+#   'a': 'space'                  button -> keyboard key (the pad button is released)
+#   'a': 'pad:b'                  button -> another pad button
+#   'lx': {'to': 'ly', 'invert': True, 'scale': 1.5}
+#                                 axis -> axis (sticks to sticks, triggers to triggers);
+#                                 like buttons, the source axis stops driving its own
+#                                 output unless another entry maps onto it
+from decode import BUTTON_BITS, SIGNED
+
+AXES = ('lx', 'ly', 'rx', 'ry', 'lt', 'rt') # report order
+STICK_AXES = AXES[:4]
+PAD_PREFIX = 'pad:'
+_LOW_BITS = 7 # button word is split in two 7-bit halves -> two 128-entry tables
+
+IDENTITY_AXES = tuple(range(len(AXES)))
+
+
+class RemapTable:
+    # Filled in by compile_map
+    def __init__(self):
+        self.low = ()                 # low 7 input bits -> output pad bits
+        self.high = ()                # high 7 input bits -> output pad bits
+        self.key_mask = 0             # input bits that drive keyboard keys
+        self.keys = ()                # bit -> resolved key
+        self.axis_src = IDENTITY_AXES # output axis -> input axis index
+        self.axis_tables = ()         # output axis -> 256-entry raw value table
+        self.remaps_axes = False
+        self.remaps_buttons = False
+
+    def buttons(self, word):
+        return self.low[word & 0x7F] | self.high[word >> _LOW_BITS]
+
+    def axes(self, values):
+        src, tables = self.axis_src, self.axis_tables
+        return tuple(tables[i][values[src[i]]] for i in range(len(AXES)))
+
+
+def _axis_table(is_stick, invert, scale):
+    out = []
+    for raw in range(256):
+        if is_stick:
+            v = round(SIGNED[raw] * scale)
+            if invert: v = -v
+            out.append(max(-127, min(127, v)) & 0xFF)
+        else:
+            v = round(raw * scale)
+            if invert: v = 255 - v
+            out.append(max(0, min(255, v)))
+    return tuple(out)
+
+
+def compile_map(key_map, resolve_key=None):
+    # -> RemapTable, or None when key_map changes nothing. resolve_key(name) turns
+    # a dashboard key name into whatever the keyboard backend presses (None = skip).
+    table = RemapTable()
+    bit_of = {name: i for i, name in enumerate(BUTTON_BITS)}
+    dest = list(range(len(BUTTON_BITS))) # input bit -> output bit, None = no pad output
+    keys = [None] * len(BUTTON_BITS)
+    axis_src = list(IDENTITY_AXES)
+    axis_spec = [(False, 1.0)] * len(AXES)
+    targeted = set()
+    moved = set()
+
+    for src, target in (key_map or {}).items():
+        if src in bit_of:
+            i = bit_of[src]
+            if isinstance(target, str) and target.startswith(PAD_PREFIX):
+                to = target[len(PAD_PREFIX):]
+                if to in bit_of: dest[i] = bit_of[to]
+            elif target:
+                key = resolve_key(target) if resolve_key else None
+                if key is None: continue
+                keys[i] = key
+                dest[i] = None
+        elif src in AXES and isinstance(target, dict):
+            to = target.get('to', src)
+            if to not in AXES or (src in STICK_AXES) != (to in STICK_AXES): continue
+            o = AXES.index(to)
+            axis_src[o] = AXES.index(src)
+            axis_spec[o] = (bool(target.get('invert')), float(target.get('scale', 1.0)))
+            targeted.add(o)
+            if to != src: moved.add(AXES.index(src))
+
+    def bits_for(word, shift):
+        out = 0
+        for b in range(_LOW_BITS):
+            i = b + shift
+            if word >> b & 1 and i < len(dest) and dest[i] is not None: out |= 1 << dest[i]
+        return out
+
+    n = 1 << _LOW_BITS
+    table.low = tuple(bits_for(w, 0) for w in range(n))
+    table.high = tuple(bits_for(w, _LOW_BITS) for w in range(n))
+    table.keys = tuple(keys)
+    table.key_mask = sum(1 << i for i, k in enumerate(keys) if k is not None)
+    table.remaps_buttons = dest != list(range(len(BUTTON_BITS)))
+
+    # Outputs whose axis was moved elsewhere and that nothing maps onto rest at 0
+    idle = moved - targeted
+    for o in idle: axis_spec[o] = (False, 0.0)
+    table.axis_src = tuple(axis_src)
+    table.axis_tables = tuple(
+        _axis_table(AXES[o] in STICK_AXES, *axis_spec[o]) for o in range(len(AXES)))
+    table.remaps_axes = table.axis_src != IDENTITY_AXES or any(s != (False, 1.0) for s in axis_spec)
+
+    if not (table.remaps_buttons or table.remaps_axes): return None
+    return table
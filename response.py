@@ -0,0 +1,118 @@
+# --- Stick / trigger response curves ---
+# Deadzones, anti-deadzone, saturation and curves are baked into lookup tables
+# when a player's settings change; the frame path only indexes them.
+#   stick:   array('H') of 65536, index x << 8 | y (raw bytes) -> x' << 8 | y'
+#            (2D so a radial deadzone can look at both axes)
+#   trigger: array('B') of 256, raw -> raw
+# Settings (all optional, fractions of full travel):
+#   {'deadzone': 0.1, 'shape': 'radial'|'axial', 'outer': 0.95, 'anti_deadzone': 0.2,
+#    'curve': 'linear'|'expo'|'power'|'custom', 'expo': 0.5, 'power': 2.0,
+#    'points': [[0, 0], [0.5, 0.3], [1, 1]]}
+import json
+import math
+from array import array
+
+from decode import SIGNED
+
+_cache = {} # identical settings (e.g. the same profile on every player) share tables
+CACHE_SIZE = 16 # stick tables are 128 KiB each; dragging a slider shouldn't keep them all
+
+
+def _key(kind, cfg):
+    return kind + json.dumps(cfg, sort_keys=True)
+
+
+def _store(key, table):
+    if len(_cache) >= CACHE_SIZE: del _cache[next(iter(_cache))]
+    _cache[key] = table
+    return table
+
+
+def _curve(cfg):
+    # -> f(t) on 0..1 after the deadzone rescale
+    name = cfg.get('curve', 'linear')
+    if name == 'expo':
+        e = min(1.0, max(0.0, float(cfg.get('expo', 0.5))))
+        return lambda t: t * (1 - e) + t * t * t * e
+    if name == 'power':
+        g = max(0.1, float(cfg.get('power', 2.0)))
+        return lambda t: t ** g
+    if name == 'custom':
+        given = dict((float(x), float(y)) for x, y in cfg.get('points', ()))
+        end = given.get(1.0, 1.0)
+        pts = [(0.0, 0.0)] + sorted(p for p in given.items() if 0.0 < p[0] < 1.0) + [(1.0, end)]
+        def f(t):
+            for (x0, y0), (x1, y1) in zip(pts, pts[1:]):
+                if t <= x1: return y0 + (y1 - y0) * (t - x0) / (x1 - x0)
+            return pts[-1][1]
+        return f
+    return lambda t: t
+
+
+def _shaper(cfg):
+    # -> g(magnitude 0..1) -> output magnitude 0..1
+    dz = min(0.99, max(0.0, float(cfg.get('deadzone', 0.0))))
+    outer = min(1.0, max(dz + 0.01, float(cfg.get('outer', 1.0))))
+    anti = min(0.99, max(0.0, float(cfg.get('anti_deadzone', 0.0))))
+    curve = _curve(cfg)
+    def g(m):
+        if m <= dz: return 0.0
+        t = min(1.0, (m - dz) / (outer - dz))
+        return anti + (1.0 - anti) * min(1.0, max(0.0, curve(t)))
+    return g
+
+
+def is_identity(cfg):
+    return not cfg or all(cfg.get(k, v) == v for k, v in
+        (('deadzone', 0), ('outer', 1), ('anti_deadzone', 0), ('curve', 'linear')))
+
+
+def stick_table(cfg):
+    # None when cfg leaves the stick untouched
+    if is_identity(cfg): return None
+    key = _key('stick', cfg)
+    if key in _cache: return _cache[key]
+    g = _shaper(cfg)
+    radial = cfg.get('shape', 'radial') != 'axial'
+    table = array('H', bytes(2 * 65536))
+    # Per-axis results are shared by every cell in axial mode
+    axial = [0] * 256
+    for b in range(256):
+        v = max(-127, SIGNED[b]) / 127.0
+        axial[b] = round(math.copysign(g(abs(v)), v) * 127) & 0xFF
+    for x in range(256):
+        vx = max(-127, SIGNED[x]) / 127.0
+        row = x << 8
+        for y in range(256):
+            if not radial:
+                table[row | y] = axial[x] << 8 | axial[y]
+                continue
+            vy = max(-127, SIGNED[y]) / 127.0
+            m = math.hypot(vx, vy)
+            if m == 0.0: continue
+            k = g(min(1.0, m)) / m
+            ox = max(-127, min(127, round(vx * k * 127)))
+            oy = max(-127, min(127, round(vy * k * 127)))
+            table[row | y] = (ox & 0xFF) << 8 | (oy & 0xFF)
+    return _store(key, table)
+
+
+def trigger_table(cfg):
+    if is_identity(cfg): return None
+    key = _key('trigger', cfg)
+    if key in _cache: return _cache[key]
+    g = _shaper(cfg)
+    return _store(key, array('B', (min(255, round(g(v / 255.0) * 255)) if v else 0 for v in range(256))))
+
+
+class Response:
+    # A player's compiled tables; None entries are skipped in the frame path
+    def __init__(self, settings=None):
+        settings = settings or {}
+        self.settings = settings
+        self.left = stick_table(settings.get('left') or {})
+        self.right = stick_table(settings.get('right') or {})
+        self.trigger = trigger_table(settings.get('triggers') or {})
+
+    def active(self):
+        return self.left is not None or self.right is not None or self.trigger is not None
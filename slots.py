@@ -0,0 +1,91 @@
+# --- Player slot allocation ---
+# Free slots are bits in two ints (fresh, reserved), so claim and release are
+# O(1): the lowest free slot is the lowest set bit (m & -m). A released slot
+# remembers the host it served and is handed out last, which lets a phone that
+# drops and comes back (Wi-Fi roam, app restart) land on the same virtual pad /
+# player number. Affinity only applies while someone else is connected: with
+# nobody on, the lowest slot goes out, so a lone phone (new IP after DHCP
+# renewal included) is always player 1 and gets text/mouse input.
+import threading
+
+# ViGEmBus itself doesn't cap targets, but XInput games only see four X360 pads;
+# past that, DS4 pads or games reading raw HID are needed. 16 keeps the bus sane.
+MAX_CAPACITY = 16
+
+
+def lowest(mask):
+    # Index of the lowest set bit
+    return (mask & -mask).bit_length() - 1
+
+
+class SlotAllocator:
+    def __init__(self, capacity):
+        self.lock = threading.Lock()
+        self.capacity = 0
+        self.fresh = 0     # bitmask: free slots nobody is expected back on
+        self.reserved = 0  # bitmask: free slots kept for the host that left them
+        self.holder = {}   # reserved slot -> host, oldest release first
+        self.used = {}     # slot -> host
+        self.last_slot = {} # host -> slot it held last
+        self.affinity_hits = 0
+        self.resize(capacity)
+
+    def resize(self, capacity):
+        # Only while nothing is claimed (server stopped)
+        capacity = max(1, min(MAX_CAPACITY, int(capacity)))
+        with self.lock:
+            if self.used: raise RuntimeError("Cannot resize while players are connected")
+            self.capacity = capacity
+            self.holder = {s: h for s, h in self.holder.items() if s < capacity}
+            self.reserved = 0
+            for s in self.holder: self.reserved |= 1 << s
+            self.fresh = ((1 << capacity) - 1) & ~self.reserved
+            self.last_slot = {h: s for s, h in self.holder.items()}
+        return capacity
+
+    def _unreserve(self, slot):
+        # -> host the slot was kept for
+        self.reserved &= ~(1 << slot)
+        return self.holder.pop(slot)
+
+    def claim(self, host=None):
+        # -> slot index, or None when full
+        with self.lock:
+            slot = self.last_slot.get(host)
+            if not self.used and (self.fresh | self.reserved):
+                # Nobody connected: lowest free slot, the host's own only if it is the lowest
+                low = lowest(self.fresh | self.reserved)
+                if slot == low and low in self.holder: self.affinity_hits += 1
+                if slot is not None and slot != low and self.holder.get(slot) == host:
+                    self._unreserve(slot) # its old slot is nobody's anymore
+                    self.fresh |= 1 << slot
+                slot = low
+                if self.reserved >> slot & 1: self.last_slot.pop(self._unreserve(slot), None)
+                else: self.fresh &= ~(1 << slot)
+            elif slot is not None and self.reserved >> slot & 1:
+                self._unreserve(slot)
+                self.affinity_hits += 1
+            elif self.fresh:
+                slot = lowest(self.fresh)
+                self.fresh &= ~(1 << slot)
+            elif self.reserved:
+                # Out of fresh slots: take the one whose owner left longest ago
+                slot = next(iter(self.holder))
+                self.last_slot.pop(self._unreserve(slot), None)
+            else:
+                return None
+            self.used[slot] = host
+            if host is not None: self.last_slot[host] = slot
+            return slot
+
+    def release(self, slot):
+        with self.lock:
+            if slot not in self.used: return # already released (e.g. by stop_server)
+            host = self.used.pop(slot)
+            if host is not None and self.last_slot.get(host) == slot:
+                self.reserved |= 1 << slot
+                self.holder[slot] = host
+            else: self.fresh |= 1 << slot
+
+    def in_use(self):
+        return len(self.used)
@@ -0,0 +1,96 @@
+# --- Latency telemetry ---
+# Fixed-size rings written by one thread per player at a time (the event loop, or
+# the reader / UDP threads under the player's frame_lock) and read by copying, so
+# readers never take a lock and the hot path never allocates.
+from array import array
+
+# Stages of a DATA frame, all in seconds:
+#   net     client timestamp -> server receive, above the lowest delay seen (queueing/jitter)
+#   decode  receive -> frame decoded
+#   apply   decoded -> backend update() returned
+#   total   receive -> backend update() returned
+STAGES = ('net', 'decode', 'apply', 'total')
+
+
+class LatencyStats:
+    # Per-frame processing latency, kept in a fixed ring so the hot path never allocates
+    def __init__(self, size=1024):
+        self.samples = array('d', bytes(8 * size))
+        self.size = size
+        self.count = 0
+
+    def add(self, seconds):
+        self.samples[self.count % self.size] = seconds
+        self.count += 1
+
+    def values(self):
+        return list(self.samples[:min(self.count, self.size)])
+
+    def clear(self):
+        self.count = 0
+
+
+def summarize_latency(values):
+    if not values: return {'samples': 0, 'avg_us': 0, 'p50_us': 0, 'p95_us': 0, 'p99_us': 0, 'max_us': 0}
+    values = sorted(values)
+    n = len(values)
+    return {
+        'samples': n,
+        'avg_us': round(sum(values) / n * 1e6, 1),
+        'p50_us': round(values[n // 2] * 1e6, 1),
+        'p95_us': round(values[min(n - 1, int(n * 0.95))] * 1e6, 1),
+        'p99_us': round(values[min(n - 1, int(n * 0.99))] * 1e6, 1),
+        'max_us': round(values[-1] * 1e6, 1)
+    }
+
+
+class FrameTiming:
+    # One ring per stage for a player's DATA frames
+    def __init__(self, size=1024):
+        self.rings = {s: LatencyStats(size) for s in STAGES}
+        self.net = self.rings['net']
+        self.decode = self.rings['decode']
+        self.apply = self.rings['apply']
+        self.total = self.rings['total']
+        # Client clocks aren't synced with ours, so one-way delay is measured
+        # against the smallest (clock offset + delay) seen in the current/last window
+        self.floor = None
+        self.window_min = None
+        self.prev_min = None
+        self.window_n = 0
+
+    def record(self, t_recv, t_decoded, t_applied):
+        self.decode.add(t_decoded - t_recv)
+        self.apply.add(t_applied - t_decoded)
+        self.total.add(t_applied - t_recv)
+
+    def record_client(self, client_ms, now_ms):
+        # client_ms is the frame's u32 millisecond timestamp, 0 when the client doesn't send one
+        if not client_ms: return
+        delta = ((now_ms - client_ms + 0x80000000) & 0xFFFFFFFF) - 0x80000000
+        if self.window_min is None or delta < self.window_min: self.window_min = delta
+        self.floor = self.window_min if self.prev_min is None else min(self.prev_min, self.window_min)
+        self.net.add((delta - self.floor) / 1000.0)
+        self.window_n += 1
+        if self.window_n >= 1024:
+            self.prev_min, self.window_min, self.window_n = self.window_min, None, 0
+
+    def summary(self):
+        out = {}
+        for s in STAGES:
+            vals = sorted(self.rings[s].values())
+            n = len(vals)
+            if not n:
+                out[s] = {'p50': 0, 'p95': 0, 'p99': 0}
+                continue
+            out[s] = {
+                'p50': round(vals[n // 2] * 1e3, 3),
+                'p95': round(vals[min(n - 1, int(n * 0.95))] * 1e3, 3),
+                'p99': round(vals[min(n - 1, int(n * 0.99))] * 1e3, 3),
+            }
+        return out # milliseconds
+
+    def clear(self):
+        for r in self.rings.values(): r.clear()
+        self.floor = self.window_min = self.prev_min = None
+        self.window_n = 0
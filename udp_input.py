@@ -0,0 +1,93 @@
+# --- UDP input channel for gamepad DATA frames ---
+# Control traffic (HELLO, TEXT, MOUSE, rumble...) stays on TCP; only the 0x01
+# stick/button state goes over UDP so one lost datagram never stalls newer ones.
+#
+# Datagram: [0x01][slot][seq u32 BE][16-byte DATA payload]
+# A client learns its slot with the TCP UDP_BIND opcode (0x06), which the server
+# answers with [0x06][slot][udp port u16 BE]. Sequence numbers start anywhere and
+# wrap at 2^32; anything not newer than the last accepted seq is dropped.
+import socket
+import struct
+import threading
+
+UDP_PORT = 6000
+HEADER = struct.Struct('>BBI')
+PACKET_SIZE = HEADER.size + 16
+
+
+def seq_newer(seq, last):
+    # Serial number arithmetic (RFC 1982) over 32 bits
+    return 0 < ((seq - last) & 0xFFFFFFFF) < 0x80000000
+
+
+class UdpInput:
+    def __init__(self, on_frame, port=UDP_PORT, host='0.0.0.0'):
+        # on_frame(slot, addr, payload) -> bool, False if the sender doesn't own the slot
+        self.on_frame = on_frame
+        self.port = port
+        self.host = host
+        self.sock = None
+        self.running = False
+        self.last_seq = {}
+        self.buf = bytearray(64)
+        self.view = memoryview(self.buf)
+
+        # Stats
+        self.received = 0
+        self.accepted = 0
+        self.stale = 0
+        self.rejected = 0
+        self.malformed = 0
+
+    def open(self):
+        self.sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        self.sock.bind((self.host, self.port))
+        self.port = self.sock.getsockname()[1]
+        self.running = True
+        return self.sock
+
+    def close(self):
+        self.running = False
+        if self.sock:
+            try: self.sock.close()
+            except: pass
+            self.sock = None
+
+    def reset(self, slot):
+        # Called when a slot is (re)bound so a new client's sequence starts fresh
+        self.last_seq.pop(slot, None)
+
+    def handle_readable(self):
+        n, addr = self.sock.recvfrom_into(self.buf)
+        self.received += 1
+        if n != PACKET_SIZE or self.buf[0] != 0x01:
+            self.malformed += 1
+            return
+        _, slot, seq = HEADER.unpack_from(self.buf)
+        last = self.last_seq.get(slot)
+        if last is not None and not seq_newer(seq, last):
+            self.stale += 1
+            return
+        if not self.on_frame(slot, addr, self.view[HEADER.size:PACKET_SIZE]):
+            self.rejected += 1
+            return
+        self.last_seq[slot] = seq
+        self.accepted += 1
+
+    def serve_forever(self):
+        while self.running:
+            try: self.handle_readable()
+            except OSError:
+                if not self.running: break
+            except Exception as e:
+                print(f"UDP Input Error: {e}")
+
+    def start(self):
+        self.open()
+        threading.Thread(target=self.serve_forever, daemon=True).start()
+
+    def stats(self):
+        return {
+            'received': self.received, 'accepted': self.accepted,
+            'stale': self.stale, 'rejected': self.rejected, 'malformed': self.malformed
+        }